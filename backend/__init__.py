@@ -0,0 +1,2 @@
+# Load backend/.env before any module reads its settings
+from . import config  # noqa: F401
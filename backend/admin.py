@@ -0,0 +1,20 @@
+import hmac
+import os
+
+from fastapi import HTTPException, Request
+
+# Shared secret for admin-only behaviour; unset disables admin requests entirely
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+ADMIN_HEADER = "X-Admin-Token"
+
+
+def is_admin_request(request: Request) -> bool:
+    """Whether the request carries the configured admin token"""
+    token = request.headers.get(ADMIN_HEADER)
+    return bool(ADMIN_TOKEN) and token is not None and hmac.compare_digest(token, ADMIN_TOKEN)
+
+
+async def require_admin(request: Request) -> None:
+    """Dependency rejecting requests without the admin token"""
+    if not is_admin_request(request):
+        raise HTTPException(status_code=403, detail="Admin token required")
@@ -0,0 +1,123 @@
+"""Compare per-request serialization CPU of the standard and FAST_JSON paths
+
+    python -m backend.bench_serialization --iterations 20000
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import serialize_response
+
+try:
+    from fastapi.utils import create_model_field as create_field
+except ImportError:  # FastAPI < 0.111
+    from fastapi.utils import create_response_field as create_field
+
+from .models import DailyGameResponse, GameResult, ScoreResponse, UserAnswer
+from .routes.game import FALLBACK_GAME_TEMPLATE
+from .scoring import CompiledGame
+from .serialization import serializer_for
+
+GAME = dict(FALLBACK_GAME_TEMPLATE, date="2025-01-01")
+COMPILED = CompiledGame(GAME)
+SELECTED = ["rac1", "rac2", "fac3"]
+SCORE = {
+    "base_score": 2,
+    "bonus_score": 0.8,
+    "total_score": 2.8,
+    "max_score": 5,
+    "correct_answers": ["rac1", "rac2"],
+    "legal_detector_breakdown": {
+        "rac1": {"percentage": 42.0, "bonus": 0.3, "rarity": "moderate"},
+        "rac2": {"percentage": 12.5, "bonus": 0.5, "rarity": "rare"},
+    },
+}
+SCORE_FIELD = create_field(name="Response_submit", type_=ScoreResponse)
+
+_loop = asyncio.new_event_loop()
+
+
+def standard_score() -> bytes:
+    # What FastAPI does for a route declaring response_model=ScoreResponse
+    response = ScoreResponse(**SCORE)
+    content = _loop.run_until_complete(serialize_response(field=SCORE_FIELD, response_content=response))
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_score() -> bytes:
+    return orjson.dumps(SCORE)
+
+
+def standard_result_document() -> dict:
+    answers = [UserAnswer(**answer) for answer in COMPILED.user_answers(SELECTED)]
+    return GameResult(
+        game_date="2025-01-01",
+        session_id="bench",
+        selected_clauses=SELECTED,
+        score={"base": 2, "bonus": 0.8, "total": 2.8},
+        user_answers=answers,
+        completion_time=42,
+    ).dict()
+
+
+def fast_result_document() -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "game_date": "2025-01-01",
+        "user_id": None,
+        "session_id": "bench",
+        "selected_clauses": SELECTED,
+        "score": {"base": 2.0, "bonus": 0.8, "total": 2.8},
+        "user_answers": COMPILED.user_answers(SELECTED),
+        "completion_time": 42,
+        "submitted_at": datetime.utcnow(),
+    }
+
+
+def standard_game() -> bytes:
+    content = jsonable_encoder(DailyGameResponse(**GAME))
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_game() -> bytes:
+    return serializer_for(DailyGameResponse).dump_json(DailyGameResponse(**GAME))
+
+
+def measure(function: Callable[[], object], iterations: int) -> float:
+    """CPU microseconds per call"""
+    function()
+    started = time.process_time()
+    for _ in range(iterations):
+        function()
+    return (time.process_time() - started) / iterations * 1e6
+
+
+def main(iterations: int) -> Dict[str, Dict[str, float]]:
+    cases = {
+        "submit response": (standard_score, fast_score),
+        "result document": (standard_result_document, fast_result_document),
+        "daily game body": (standard_game, fast_game),
+    }
+    report = {}
+    for name, (standard, fast) in cases.items():
+        standard_us = measure(standard, iterations)
+        fast_us = measure(fast, iterations)
+        report[name] = {
+            "standard_us": round(standard_us, 2),
+            "fast_us": round(fast_us, 2),
+            "saved_us": round(standard_us - fast_us, 2),
+            "speedup": round(standard_us / fast_us, 2) if fast_us else 0.0,
+        }
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    print(json.dumps(main(parser.parse_args().iterations), indent=2))
@@ -0,0 +1,244 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after a fixed time-to-live"""
+
+    def __init__(self, maxsize: int = 128, ttl: float = 3600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store value under key, evicting the least recently used entry if full"""
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Unexpired entries, least recently used first"""
+        now = time.monotonic()
+        return [(key, value) for key, (expires_at, value) in self._entries.items() if expires_at >= now]
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single entry"""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# Serialized DailyGameResponse bodies (CachedResponse) keyed by game date
+game_cache = TTLCache(
+    maxsize=int(os.environ.get("GAME_CACHE_SIZE", "64")),
+    ttl=float(os.environ.get("GAME_CACHE_TTL", "3600")),
+)
+
+# CompiledGame scoring indexes keyed by game date
+scoring_cache = TTLCache(
+    maxsize=int(os.environ.get("GAME_CACHE_SIZE", "64")),
+    ttl=float(os.environ.get("GAME_CACHE_TTL", "3600")),
+)
+
+# Parsed prerender metadata, (meta.json mtime_ns, meta), keyed by game date
+prerendered_cache = TTLCache(
+    maxsize=int(os.environ.get("GAME_CACHE_SIZE", "64")),
+    ttl=float(os.environ.get("GAME_CACHE_TTL", "3600")),
+)
+
+
+def invalidate_game(game_date: str) -> None:
+    """Drop everything cached for one game date"""
+    game_cache.invalidate(game_date)
+    scoring_cache.invalidate(game_date)
+    prerendered_cache.invalidate(game_date)
+
+
+def clear_game_caches() -> None:
+    """Drop everything cached for every game date"""
+    game_cache.clear()
+    scoring_cache.clear()
+    prerendered_cache.clear()
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one in-flight task"""
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+
+    def running(self, key: Hashable) -> bool:
+        """Whether a task for key is in flight"""
+        return key in self._tasks
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Await the in-flight task for key, starting one from factory if none is running"""
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        # Shield so one cancelled caller does not cancel the shared task
+        return await asyncio.shield(task)
+
+
+async def read_content_version(db) -> int:
+    """The stored games content version; 0 before any migration bumped it"""
+    document = await db.content_versions.find_one({"_id": "games"})
+    return document["version"] if document else 0
+
+
+class ContentVersion:
+    """This process's view of the stored games content version
+
+    Migrations, swaps and imports bump the version in content_versions, and
+    every process clears its game caches together the first time it sees a
+    new one, so other API workers and CLI runs cannot leave stale games or
+    scoring indexes behind. Prerendered artifacts carry the version they
+    were rendered from and are ignored once it is no longer current. The stored version is read at most once every
+    check_interval seconds.
+    """
+
+    def __init__(self, check_interval: float = 5.0):
+        self.check_interval = check_interval
+        self.version: Optional[int] = None
+        self._checked_at: Optional[float] = None
+        self._flights = SingleFlight()
+
+    async def check(self, db) -> None:
+        """Clear the game caches if the stored version moved since the last check"""
+        if self._checked_at is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return
+        await self._flights.run("games", lambda: self._refresh(db))
+
+    async def _refresh(self, db) -> None:
+        version = await read_content_version(db)
+        if self.version is not None and version != self.version:
+            clear_game_caches()
+            logger.info(f"Games content version moved from {self.version} to {version}; cleared game caches")
+        self.version = version
+        self._checked_at = time.monotonic()
+
+
+content_version = ContentVersion(
+    check_interval=float(os.environ.get("CONTENT_VERSION_CHECK_SECONDS", "5")),
+)
+
+
+class StaleWhileRevalidateCache:
+    """Per-key cache that keeps serving expired values while one background refresh runs
+
+    Values younger than fresh_for seconds are served as is. Older values up to
+    max_stale seconds are still served, and trigger a single refresh per key.
+    Anything older, or missing, is loaded before returning.
+    """
+
+    def __init__(self, fresh_for: float = 1.0, max_stale: float = 30.0, maxsize: int = 1024):
+        self.fresh_for = fresh_for
+        self.max_stale = max_stale
+        self.maxsize = maxsize
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refresh_errors = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._flights = SingleFlight()
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Cached value for key, loading or refreshing it with loader as needed"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            loaded_at, value = entry
+            age = time.monotonic() - loaded_at
+            if age <= self.fresh_for:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return value
+            if age <= self.max_stale:
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                if not self._flights.running(key):
+                    asyncio.ensure_future(self._refresh_in_background(key, loader))
+                return value
+
+        self.misses += 1
+        return await self._flights.run(key, lambda: self._load(key, loader))
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = await loader()
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return value
+
+    async def _refresh_in_background(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> None:
+        try:
+            await self._flights.run(key, lambda: self._load(key, loader))
+        except Exception as e:
+            # Keep serving the stale value until max_stale runs out
+            self.refresh_errors += 1
+            logger.error(f"Error refreshing cached value for {key}: {e}")
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single entry"""
+        self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit/stale/miss counters"""
+        return {
+            "size": len(self._entries),
+            "fresh_for": self.fresh_for,
+            "max_stale": self.max_stale,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refresh_errors": self.refresh_errors,
+        }
+
+
+# Serialized GET /api/stats bodies (CachedResponse) keyed by game date
+stats_cache = StaleWhileRevalidateCache(
+    fresh_for=float(os.environ.get("STATS_FRESH_SECONDS", "1")),
+    max_stale=float(os.environ.get("STATS_MAX_STALE_SECONDS", "30")),
+)
@@ -0,0 +1,13 @@
+"""Loads backend/.env into the environment
+
+Modules throughout the backend read their settings from os.environ at
+import time, so the package __init__ imports this before any of them:
+the API, the CLIs (python -m backend.prerender, backend.content_import)
+and the root migration scripts all see the same configuration.
+"""
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
@@ -0,0 +1,251 @@
+"""Streaming game content import from NDJSON or JSON array files
+
+Records are decoded incrementally, validated one at a time and upserted in
+batches of IMPORT_BATCH_SIZE, so memory stays bounded by one batch however
+long the file is. After every batch a checkpoint in content_import_checkpoints
+records how far the source got; rerunning an interrupted import skips the
+records it already wrote.
+
+    python -m backend.content_import games.ndjson [--batch-size 500] [--no-resume]
+"""
+import argparse
+import asyncio
+import codecs
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from .cache import invalidate_game
+from .content_migration import bump_content_version, content_hash, parse_game, upsert_operation
+from .prerender import remove_prerendered
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = int(os.environ.get("IMPORT_BATCH_SIZE", "500"))
+READ_CHUNK_SIZE = 64 * 1024
+# Largest single record accepted; input stuck past this is malformed, not just split
+MAX_RECORD_CHARS = 16 * 1024 * 1024
+# Invalid records reported back in full; the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+
+class RecordDecoder:
+    """Push decoder yielding records from NDJSON or from a JSON array as text arrives"""
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._array: Optional[bool] = None
+        self._finished = False
+        self.line = 0
+
+    def feed(self, text: str) -> List[Any]:
+        """Records completed by text; a malformed NDJSON line comes back as a ValueError"""
+        self._buffer += text
+        if self._array is None:
+            stripped = self._buffer.lstrip()
+            if not stripped:
+                self._buffer = ""
+                return []
+            self._array = stripped.startswith("[")
+            self._buffer = stripped[1:] if self._array else stripped
+        return self._feed_array() if self._array else self._feed_lines()
+
+    def _feed_lines(self) -> List[Any]:
+        records = []
+        start = 0
+        while True:
+            end = self._buffer.find("\n", start)
+            if end == -1:
+                break
+            records.extend(self._parse_line(self._buffer[start:end]))
+            start = end + 1
+        self._buffer = self._buffer[start:]
+        if len(self._buffer) > MAX_RECORD_CHARS:
+            # Without a newline in sight the rest of the input would pile up here
+            raise ValueError(f"line {self.line + 1} is longer than MAX_RECORD_CHARS")
+        return records
+
+    def _parse_line(self, line: str) -> List[Any]:
+        self.line += 1
+        if not line.strip():
+            return []
+        try:
+            return [json.loads(line)]
+        except ValueError as e:
+            return [ValueError(f"line {self.line}: {e}")]
+
+    def _feed_array(self) -> List[Any]:
+        records = []
+        position = 0
+        while not self._finished:
+            while position < len(self._buffer) and self._buffer[position] in " \t\r\n,":
+                position += 1
+            if position == len(self._buffer):
+                break
+            if self._buffer[position] == "]":
+                self._finished = True
+                position += 1
+                break
+            try:
+                record, position = self._decoder.raw_decode(self._buffer, position)
+            except ValueError:
+                # The record continues in the next chunk
+                if len(self._buffer) - position > MAX_RECORD_CHARS:
+                    raise ValueError("JSON array record is malformed or larger than MAX_RECORD_CHARS")
+                break
+            records.append(record)
+        self._buffer = self._buffer[position:]
+        return records
+
+    def close(self) -> List[Any]:
+        """Records left at end of input; raises ValueError on a truncated JSON array"""
+        if self._array:
+            if not self._finished:
+                raise ValueError("JSON array is truncated or malformed")
+            return []
+        remainder, self._buffer = self._buffer, ""
+        return self._parse_line(remainder) if remainder.strip() else []
+
+
+class ContentImporter:
+    """Validates records and upserts them into games in checkpointed batches"""
+
+    def __init__(self, db: AsyncIOMotorDatabase, source: str, fingerprint: Optional[str] = None,
+                 batch_size: int = IMPORT_BATCH_SIZE, resume: bool = True):
+        self.db = db
+        self.source = source
+        self.fingerprint = fingerprint
+        self.batch_size = batch_size
+        self.resume = resume
+        self.position = 0
+        self.resumed_from = 0
+        self.written = 0
+        self.invalid = 0
+        self.batches = 0
+        self.errors: List[str] = []
+        self._batch: List[Dict[str, Any]] = []
+
+    async def start(self) -> None:
+        """Pick up from the source's checkpoint when it belongs to an unfinished run of the same input"""
+        checkpoint = await self.db.content_import_checkpoints.find_one({"_id": self.source})
+        if (self.resume and checkpoint and not checkpoint.get("completed")
+                and checkpoint.get("fingerprint") == self.fingerprint):
+            self.resumed_from = checkpoint["records_done"]
+            self.written = checkpoint.get("written", 0)
+            self.invalid = checkpoint.get("invalid", 0)
+            logger.info(f"Resuming import of {self.source} after {self.resumed_from} records")
+
+    async def add(self, record: Any) -> None:
+        self.position += 1
+        if self.position <= self.resumed_from:
+            return
+        try:
+            if isinstance(record, Exception):
+                raise record
+            if not isinstance(record, dict):
+                raise ValueError("record is not a JSON object")
+            self._batch.append(parse_game(record))
+        except ValueError as e:
+            self.invalid += 1
+            if len(self.errors) < MAX_REPORTED_ERRORS:
+                self.errors.append(f"record {self.position}: {e}")
+        if len(self._batch) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self, completed: bool = False) -> None:
+        """Write the pending batch, then move the checkpoint past it"""
+        if self._batch:
+            now = datetime.utcnow()
+            await self.db.games.bulk_write([upsert_operation(game, content_hash(game), now) for game in self._batch], ordered=False)
+            await bump_content_version(self.db)
+            for game in self._batch:
+                invalidate_game(game["date"])
+                remove_prerendered(game["date"])
+            self.written += len(self._batch)
+            self.batches += 1
+            self._batch = []
+
+        await self.db.content_import_checkpoints.update_one(
+            {"_id": self.source},
+            {"$set": {
+                "fingerprint": self.fingerprint,
+                "records_done": self.position,
+                "written": self.written,
+                "invalid": self.invalid,
+                "completed": completed,
+                "updated_at": datetime.utcnow()
+            }},
+            upsert=True
+        )
+        logger.info(f"Imported {self.position} records from {self.source}: {self.written} written, {self.invalid} invalid")
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "records": self.position,
+            "resumed_from": self.resumed_from,
+            "written": self.written,
+            "invalid": self.invalid,
+            "batches": self.batches,
+            "errors": self.errors,
+        }
+
+
+async def import_stream(db: AsyncIOMotorDatabase, chunks: AsyncIterator[bytes], source: str,
+                        fingerprint: Optional[str] = None, batch_size: int = IMPORT_BATCH_SIZE,
+                        resume: bool = True) -> Dict[str, Any]:
+    """Import games from a stream of UTF-8 chunks and return a summary"""
+    importer = ContentImporter(db, source, fingerprint, batch_size, resume)
+    await importer.start()
+    decoder = RecordDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    async for chunk in chunks:
+        for record in decoder.feed(text_decoder.decode(chunk)):
+            await importer.add(record)
+    for record in decoder.feed(text_decoder.decode(b"", final=True)) + decoder.close():
+        await importer.add(record)
+    await importer.flush(completed=True)
+    return importer.report()
+
+
+async def read_file(path: str) -> AsyncIterator[bytes]:
+    with open(path, "rb") as f:
+        while True:
+            chunk = await asyncio.to_thread(f.read, READ_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+async def import_file(db: AsyncIOMotorDatabase, path: str, source: Optional[str] = None,
+                      batch_size: int = IMPORT_BATCH_SIZE, resume: bool = True) -> Dict[str, Any]:
+    """Import games from an NDJSON or JSON array file"""
+    stat_result = os.stat(path)
+    fingerprint = f"{stat_result.st_size}:{int(stat_result.st_mtime)}"
+    return await import_stream(db, read_file(path), source or os.path.abspath(path), fingerprint, batch_size, resume)
+
+
+async def main(args: argparse.Namespace) -> None:
+    from .database import connect_database, close_database
+
+    db = await connect_database()
+    try:
+        report = await import_file(db, args.path, args.source, args.batch_size, not args.no_resume)
+        print(json.dumps(report, indent=2))
+    finally:
+        await close_database()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream games from an NDJSON or JSON array file into the games collection")
+    parser.add_argument("path")
+    parser.add_argument("--source", help="checkpoint name (default: the file's absolute path)")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument("--no-resume", action="store_true", help="start over even if an earlier run was interrupted")
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(main(parser.parse_args()))
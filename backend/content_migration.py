@@ -0,0 +1,246 @@
+"""Diff-based and staged game content migration
+
+Each incoming day is hashed over its content fields and compared with the
+content_hash stored on the games collection. Only new, changed and (with
+prune) removed days are written, through a single unordered bulk_write of
+upserts and deletes, so unchanged days are never rewritten and there is no
+window in which games are missing. Results, stats and score histograms are
+left alone unless a reset is asked for, and then only for the days whose
+content changed or was removed.
+
+swap_games instead replaces the whole collection: it loads a staging
+collection at full bulk speed, indexes and checks it, then renames it
+over games in one step, so readers see either the old or the new dataset.
+
+Both bump the games content version, which tells every API process to
+drop its cached games, scoring indexes and prerender metadata at once.
+"""
+import hashlib
+import json
+import logging
+import uuid
+import re
+from datetime import datetime
+from typing import Any, Dict, Iterable, List
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import ValidationError
+from pymongo import DeleteOne, UpdateOne
+
+from .cache import clear_game_caches, invalidate_game, stats_cache
+from .indexes import REQUIRED_INDEXES
+from .models import GameDataCreate
+from .prerender import remove_prerendered
+
+logger = logging.getLogger(__name__)
+
+# Fields that make up a day's content; ids and timestamps are not part of the diff
+CONTENT_FIELDS = ("title", "tc_text", "real_absurd_clauses", "fake_absurd_clauses", "quiz_order")
+
+# Per-date collections a migration may reset, with the field holding the date
+RESETTABLE = {"game_results": "game_date", "game_stats": "date", "score_histograms": "date"}
+
+
+def content_of(game: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: game[field] for field in CONTENT_FIELDS}
+
+
+def content_hash(game: Dict[str, Any]) -> str:
+    """Stable hash of a day's content fields"""
+    canonical = json.dumps(content_of(game), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def upsert_operation(game: Dict[str, Any], digest: str, now: datetime) -> UpdateOne:
+    """Upsert of one day's content that keeps the stored id and created_at"""
+    return UpdateOne(
+        {"date": game["date"]},
+        {
+            "$set": dict(content_of(game), content_hash=digest, updated_at=now),
+            "$setOnInsert": {"id": game.get("id") or str(uuid.uuid4()), "created_at": game.get("created_at") or now},
+            "$unset": {"fallback": ""}
+        },
+        upsert=True
+    )
+
+
+async def stored_hashes(db: AsyncIOMotorDatabase) -> Dict[str, str]:
+    """content_hash per stored date, computed for games written before hashes were stored"""
+    hashes = {}
+    missing = []
+    async for game in db.games.find({}, {"_id": 0, "date": 1, "content_hash": 1}):
+        if game.get("content_hash"):
+            hashes[game["date"]] = game["content_hash"]
+        else:
+            missing.append(game["date"])
+    if missing:
+        projection = {"_id": 0, "date": 1, **{field: 1 for field in CONTENT_FIELDS}}
+        async for game in db.games.find({"date": {"$in": missing}}, projection):
+            hashes[game["date"]] = content_hash(game) if all(field in game for field in CONTENT_FIELDS) else ""
+    return hashes
+
+
+async def bump_content_version(db: AsyncIOMotorDatabase) -> None:
+    """Mark the games content as changed for every process caching it"""
+    await db.content_versions.update_one(
+        {"_id": "games"},
+        {"$inc": {"version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+
+async def migrate_games(
+    db: AsyncIOMotorDatabase,
+    games: Iterable[Dict[str, Any]],
+    prune: bool = False,
+    dry_run: bool = False,
+    reset: Iterable[str] = ()
+) -> Dict[str, Any]:
+    """Bring the games collection in line with games and report what changed
+
+    prune deletes stored days missing from games. reset names collections
+    from RESETTABLE to clear for the days that changed or were removed.
+    """
+    reset = list(reset)
+    unknown = set(reset) - set(RESETTABLE)
+    if unknown:
+        raise ValueError(f"Cannot reset {', '.join(sorted(unknown))}; choose from {', '.join(RESETTABLE)}")
+
+    incoming = {game["date"]: game for game in games}
+    existing = await stored_hashes(db)
+
+    inserted: List[str] = []
+    updated: List[str] = []
+    unchanged: List[str] = []
+    operations = []
+    now = datetime.utcnow()
+    for game_date, game in sorted(incoming.items()):
+        digest = content_hash(game)
+        if existing.get(game_date) == digest:
+            unchanged.append(game_date)
+            continue
+        (updated if game_date in existing else inserted).append(game_date)
+        operations.append(upsert_operation(game, digest, now))
+
+    deleted = sorted(set(existing) - set(incoming)) if prune else []
+    operations.extend(DeleteOne({"date": game_date}) for game_date in deleted)
+
+    changed = updated + deleted
+    report = {
+        "dry_run": dry_run,
+        "inserted": inserted,
+        "updated": updated,
+        "deleted": deleted,
+        "unchanged": len(unchanged),
+        "reset": {name: changed for name in reset},
+    }
+    if dry_run or not operations:
+        return report
+
+    result = await db.games.bulk_write(operations, ordered=False)
+    logger.info(
+        f"Migrated games: {result.upserted_count} inserted, {result.modified_count} updated, "
+        f"{result.deleted_count} deleted, {len(unchanged)} unchanged"
+    )
+
+    await bump_content_version(db)
+    if changed:
+        for name in reset:
+            await db[name].delete_many({RESETTABLE[name]: {"$in": changed}})
+            logger.info(f"Reset {name} for {len(changed)} changed dates")
+    for game_date in inserted + changed:
+        invalidate_game(game_date)
+        stats_cache.invalidate(game_date)
+        remove_prerendered(game_date)
+    return report
+
+
+def parse_game(game: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate one day against GameDataCreate and its clause ids; raises ValueError"""
+    try:
+        parsed = GameDataCreate(**game)
+    except ValidationError as e:
+        error = e.errors()[0]
+        raise ValueError(f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}")
+    if not re.fullmatch(r"\d{4}-\d{2}-\d{2}", parsed.date):
+        raise ValueError(f"{parsed.date}: date is not YYYY-MM-DD")
+    clause_ids = [clause.id for clause in parsed.real_absurd_clauses + parsed.fake_absurd_clauses]
+    if len(set(clause_ids)) != len(clause_ids):
+        raise ValueError(f"{parsed.date}: duplicate clause ids")
+    if sorted(parsed.quiz_order) != sorted(clause_ids):
+        raise ValueError(f"{parsed.date}: quiz_order does not list each clause exactly once")
+    return parsed.dict()
+
+
+def validate_games(games: List[Dict[str, Any]]) -> List[str]:
+    """Problems that would make a dataset unsafe to swap in; empty when it is valid"""
+    problems = []
+    seen_dates = set()
+    for index, game in enumerate(games):
+        try:
+            game_date = parse_game(game)["date"]
+        except ValueError as e:
+            problems.append(f"game {index}: {e}")
+            continue
+        if game_date in seen_dates:
+            problems.append(f"{game_date}: duplicate date")
+        seen_dates.add(game_date)
+    return problems
+
+
+async def swap_games(db: AsyncIOMotorDatabase, games: Iterable[Dict[str, Any]], dry_run: bool = False) -> Dict[str, Any]:
+    """Replace the games collection through a staging collection and a single rename
+
+    Ids and created_at of days that already exist are carried over. Results
+    and stats are not touched.
+    """
+    games = list(games)
+    problems = validate_games(games)
+    if problems:
+        raise ValueError(f"Refusing to swap in invalid content: {'; '.join(problems[:10])}")
+
+    existing = {
+        game["date"]: game
+        async for game in db.games.find({}, {"_id": 0, "date": 1, "id": 1, "created_at": 1})
+    }
+    report = {
+        "dry_run": dry_run,
+        "games": len(games),
+        "added": sorted({game["date"] for game in games} - set(existing)),
+        "dropped": sorted(set(existing) - {game["date"] for game in games}),
+    }
+    if dry_run:
+        return report
+
+    now = datetime.utcnow()
+    documents = []
+    for game in games:
+        previous = existing.get(game["date"], {})
+        documents.append(dict(
+            content_of(game),
+            date=game["date"],
+            id=previous.get("id") or game.get("id") or str(uuid.uuid4()),
+            created_at=previous.get("created_at") or game.get("created_at") or now,
+            content_hash=content_hash(game),
+            updated_at=now
+        ))
+
+    staging = db[f"games_staging_{uuid.uuid4().hex[:8]}"]
+    try:
+        if documents:
+            await staging.insert_many(documents, ordered=False)
+        await staging.create_indexes(REQUIRED_INDEXES["games"])
+        loaded = await staging.count_documents({})
+        if loaded != len(documents):
+            raise RuntimeError(f"Staging collection holds {loaded} games, expected {len(documents)}")
+        await staging.rename("games", dropTarget=True)
+    except Exception:
+        await staging.drop()
+        raise
+
+    # The old dataset is gone, so nothing cached from it may be served again, here or elsewhere
+    await bump_content_version(db)
+    clear_game_caches()
+    remove_prerendered()
+    logger.info(f"Swapped in {len(documents)} games ({len(report['added'])} added, {len(report['dropped'])} dropped)")
+    return report
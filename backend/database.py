@@ -1,20 +1,141 @@
+import asyncio
 import os
-from motor.motor_asyncio import AsyncIOMotorClient
-from dotenv import load_dotenv
-from pathlib import Path
+import threading
+import time
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import monitoring
+from typing import Any, Dict, Optional
+from .metrics import METRICS_ENABLED, command_metrics
+from .slow_queries import slow_query_log
+from .profiling import PROFILING_ENABLED, mongo_span_listener
 
-ROOT_DIR = Path(__file__).parent
-load_dotenv(ROOT_DIR / '.env')
+# MongoDB connection, opened by connect_database() from the app lifespan
+client: Optional[AsyncIOMotorClient] = None
+db: Optional[AsyncIOMotorDatabase] = None
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
 
-async def get_database():
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Records how long operations wait to check a connection out of the pool"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.total_wait_ms = 0.0
+            self.max_wait_ms = 0.0
+            self.connections_created = 0
+            self.connections_closed = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Checkout counts and wait times since the last reset"""
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "avg_wait_ms": self.total_wait_ms / self.checkouts if self.checkouts else 0.0,
+                "max_wait_ms": self.max_wait_ms,
+                "open_connections": self.connections_created - self.connections_closed,
+            }
+
+    def connection_check_out_started(self, event):
+        # pymongo emits the started and finished events on the same thread
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        started = getattr(self._local, "started", None)
+        wait_ms = (time.perf_counter() - started) * 1000 if started is not None else 0.0
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_created += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_closed += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_checked_in(self, event):
+        pass
+
+
+pool_monitor = PoolMonitor()
+
+
+def client_options() -> Dict[str, Any]:
+    """Pool size and timeout settings for the Mongo client, from the environment"""
+    return {
+        "maxPoolSize": int(os.environ.get("MONGO_MAX_POOL_SIZE", "100")),
+        "minPoolSize": int(os.environ.get("MONGO_MIN_POOL_SIZE", "10")),
+        "maxIdleTimeMS": int(os.environ.get("MONGO_MAX_IDLE_TIME_MS", "300000")),
+        "connectTimeoutMS": int(os.environ.get("MONGO_CONNECT_TIMEOUT_MS", "5000")),
+        "serverSelectionTimeoutMS": int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+        "waitQueueTimeoutMS": int(os.environ.get("MONGO_WAIT_QUEUE_TIMEOUT_MS", "2000")),
+    }
+
+
+async def connect_database() -> AsyncIOMotorDatabase:
+    """Open the shared client, ping the server and pre-open minPoolSize connections"""
+    global client, db
+    if db is not None:
+        return db
+
+    options = client_options()
+    listeners = [pool_monitor]
+    if METRICS_ENABLED:
+        listeners.append(command_metrics)
+    if slow_query_log.enabled:
+        listeners.append(slow_query_log)
+    if PROFILING_ENABLED:
+        listeners.append(mongo_span_listener)
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], event_listeners=listeners, **options)
+    db = client[os.environ['DB_NAME']]
+    slow_query_log.attach(db)
+
+    # Concurrent pings each need their own connection, so this fills the pool
+    await client.admin.command("ping")
+    await asyncio.gather(*[client.admin.command("ping") for _ in range(options["minPoolSize"])])
+    return db
+
+
+async def get_database() -> AsyncIOMotorDatabase:
     """Get database instance"""
+    if db is None:
+        raise RuntimeError("Database is not connected; call connect_database() first")
     return db
 
+
 async def close_database():
     """Close database connection"""
-    client.close()
\ No newline at end of file
+    global client, db
+    if client is not None:
+        client.close()
+    slow_query_log.detach()
+    client = None
+    db = None
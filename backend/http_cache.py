@@ -0,0 +1,163 @@
+import asyncio
+import gzip
+import hashlib
+import os
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+from .serialization import render
+
+# Cache-Control for past game dates. Not immutable: a content migration may still
+# rewrite a past day, and a strong ETag keeps revalidating it to a cheap 304.
+PAST_GAME_CACHE_CONTROL = f"public, max-age={int(os.environ.get('PAST_GAME_MAX_AGE', '86400'))}"
+
+
+class CachedResponse:
+    """Serialized JSON body with the validators clients revalidate it against
+
+    encodings maps a content-coding ("br", "gzip") to the body compressed
+    once with it, so serving a compressed variant costs nothing per request.
+    fallback marks a placeholder game that real content may replace.
+    """
+
+    __slots__ = ("body", "etag", "last_modified", "encodings", "fallback")
+
+    def __init__(self, body: bytes, etag: str, last_modified: Optional[datetime] = None, encodings: Optional[Dict[str, bytes]] = None, fallback: bool = False):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.encodings = encodings or {}
+        self.fallback = fallback
+
+    def variant_etag(self, encoding: Optional[str]) -> str:
+        """Each representation gets its own strong ETag"""
+        return self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+
+    def headers(self, cache_control: str, encoding: Optional[str] = None) -> Dict[str, str]:
+        """Validator and caching headers for this body"""
+        headers = {"ETag": self.variant_etag(encoding), "Cache-Control": cache_control}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(self.last_modified, usegmt=True)
+        if self.encodings:
+            headers["Vary"] = "Accept-Encoding"
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return headers
+
+    def response(self, request: Request, cache_control: str) -> Response:
+        """Full 200 response, or an empty 304 if the client's copy is current"""
+        encoding = choose_encoding(request.headers.get("accept-encoding", ""), {name: len(body) for name, body in self.encodings.items()})
+        headers = self.headers(cache_control, encoding)
+        etags = [self.etag] + [self.variant_etag(name) for name in self.encodings]
+        if is_not_modified(request, etags, self.last_modified):
+            return Response(status_code=304, headers=headers)
+        body = self.encodings[encoding] if encoding is not None else self.body
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def compression_report(self) -> Dict[str, Any]:
+        """Body size per encoding and its ratio to the uncompressed size"""
+        size = len(self.body)
+        report = {"identity": {"bytes": size, "ratio": 1.0}}
+        for name, encoded in self.encodings.items():
+            report[name] = {"bytes": len(encoded), "ratio": round(len(encoded) / size, 3) if size else 0.0}
+        return report
+
+
+def compress_body(body: bytes) -> Dict[str, bytes]:
+    """Compressed variants of body for every encoding available here"""
+    encodings = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encodings["br"] = brotli.compress(body, mode=brotli.MODE_TEXT, quality=11)
+    return encodings
+
+
+def choose_encoding(accept_encoding: str, sizes: Dict[str, int]) -> Optional[str]:
+    """Pick the smallest precompressed variant the client accepts, or None for identity"""
+    if not sizes or not accept_encoding:
+        return None
+    accepted = set()
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip().lower())
+    candidates = [name for name in sizes if name in accepted or "*" in accepted]
+    if not candidates:
+        return None
+    return min(candidates, key=sizes.get)
+
+
+def build_cached_response(payload: Any, last_modified: Optional[datetime] = None) -> CachedResponse:
+    """Serialize payload and derive a strong ETag from the bytes"""
+    body = render(payload)
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    if last_modified is not None:
+        # Mongo hands back naive UTC datetimes; HTTP dates have whole-second precision
+        last_modified = last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+    return CachedResponse(body, etag, last_modified)
+
+
+def game_last_modified(game_data: Dict[str, Any]) -> Optional[datetime]:
+    """When a stored game's content last changed; migrations keep created_at and set updated_at"""
+    return game_data.get("updated_at") or game_data.get("created_at")
+
+
+async def build_compressed_response(payload: Any, last_modified: Optional[datetime] = None) -> CachedResponse:
+    """build_cached_response with compression run in a worker thread
+
+    gzip-9 and brotli-11 take several milliseconds per game, too long to
+    hold the event loop for.
+    """
+    cached = build_cached_response(payload, last_modified)
+    cached.encodings = await asyncio.to_thread(compress_body, cached.body)
+    return cached
+
+
+def is_not_modified(request: Request, etags: List[str], last_modified: Optional[datetime]) -> bool:
+    """Evaluate If-None-Match, or If-Modified-Since when no ETag was sent"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        # If-None-Match uses weak comparison
+        return any(tag.removeprefix("W/") in etags for tag in candidates)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified <= since
+
+    return False
+
+
+def game_cache_control(game_date: str, now: Optional[datetime] = None, fallback: bool = False) -> str:
+    """Past games are cached for a day, today's until the UTC rollover; future and fallback games must revalidate"""
+    if fallback:
+        return "no-cache"
+    now = now or datetime.now(timezone.utc)
+    today = now.strftime("%Y-%m-%d")
+    if game_date < today:
+        return PAST_GAME_CACHE_CONTROL
+    if game_date == today:
+        rollover = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        return f"public, max-age={int((rollover - now).total_seconds())}"
+    return "no-cache"
@@ -0,0 +1,87 @@
+import logging
+import time
+from typing import Any, Dict, List
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, IndexModel
+
+logger = logging.getLogger(__name__)
+
+# Indexes every collection used by the game routes needs, by collection name
+REQUIRED_INDEXES: Dict[str, List[IndexModel]] = {
+    "games": [
+        IndexModel([("date", ASCENDING)], name="date_unique", unique=True),
+    ],
+    "game_stats": [
+        IndexModel([("date", ASCENDING)], name="date_unique", unique=True),
+    ],
+    "score_histograms": [
+        IndexModel([("date", ASCENDING)], name="date_unique", unique=True),
+    ],
+    "game_results": [
+        IndexModel([("game_date", ASCENDING), ("session_id", ASCENDING)], name="game_date_session_id"),
+        IndexModel([("game_date", ASCENDING), ("submitted_at", ASCENDING)], name="game_date_submitted_at"),
+    ],
+    "status_checks": [
+        IndexModel([("timestamp", ASCENDING), ("id", ASCENDING)], name="timestamp_id"),
+    ],
+    "status_rollups": [
+        IndexModel([("client_name", ASCENDING), ("hour", ASCENDING)], name="client_name_hour_unique", unique=True),
+        IndexModel([("hour", ASCENDING)], name="hour"),
+    ],
+}
+
+# Representative query shapes that must be served by an index
+QUERY_SHAPES: List[Dict[str, Any]] = [
+    {"collection": "games", "filter": {"date": "2000-01-01"}},
+    {"collection": "game_stats", "filter": {"date": "2000-01-01"}},
+    {"collection": "game_results", "filter": {"game_date": "2000-01-01", "session_id": ""}},
+    {"collection": "game_results", "filter": {"game_date": "2000-01-01"}, "sort": [("submitted_at", ASCENDING)]},
+    {"collection": "status_checks", "filter": {}, "sort": [("timestamp", ASCENDING), ("id", ASCENDING)]},
+]
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> Dict[str, Dict[str, Any]]:
+    """Create the required indexes if missing and report build time per collection"""
+    report = {}
+    for collection_name, indexes in REQUIRED_INDEXES.items():
+        started = time.perf_counter()
+        try:
+            names = await db[collection_name].create_indexes(indexes)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            report[collection_name] = {"indexes": names, "build_ms": round(elapsed_ms, 2)}
+            logger.info(f"Ensured indexes on {collection_name} in {elapsed_ms:.1f} ms: {', '.join(names)}")
+        except Exception as e:
+            # A duplicate date must not keep the API from starting
+            report[collection_name] = {"indexes": [], "error": str(e)}
+            logger.error(f"Error creating indexes on {collection_name}: {e}")
+    return report
+
+
+def _uses_collscan(plan: Any) -> bool:
+    if isinstance(plan, dict):
+        if plan.get("stage") == "COLLSCAN":
+            return True
+        return any(_uses_collscan(value) for value in plan.values())
+    if isinstance(plan, list):
+        return any(_uses_collscan(value) for value in plan)
+    return False
+
+
+async def find_collection_scans(db: AsyncIOMotorDatabase) -> List[Dict[str, Any]]:
+    """Explain each known query shape and log the ones still planned as COLLSCAN"""
+    scans = []
+    for shape in QUERY_SHAPES:
+        try:
+            cursor = db[shape["collection"]].find(shape["filter"])
+            if "sort" in shape:
+                cursor = cursor.sort(shape["sort"])
+            explanation = await cursor.explain()
+        except Exception as e:
+            logger.error(f"Error explaining query on {shape['collection']}: {e}")
+            continue
+
+        if _uses_collscan(explanation.get("queryPlanner", {}).get("winningPlan", {})):
+            scans.append(shape)
+            logger.warning(f"Query on {shape['collection']} with filter keys {sorted(shape['filter'])} uses COLLSCAN")
+    return scans
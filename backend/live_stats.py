@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import os
+from typing import Any, Dict, Optional, Set
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+logger = logging.getLogger(__name__)
+
+
+class SubscriberLimitReached(Exception):
+    """Raised when a process already serves its maximum number of live subscribers"""
+
+
+class Subscription:
+    """One client's queue of pending updates; None in the queue ends the stream"""
+
+    def __init__(self, game_date: str, queue_size: int):
+        self.game_date = game_date
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.evicted = False
+
+
+class DateChannel:
+    """Polls one date's stats once per interval and fans changes out to its subscribers"""
+
+    def __init__(self, game_date: str, stats_collection: AsyncIOMotorCollection, interval: float):
+        self.game_date = game_date
+        self.stats_collection = stats_collection
+        self.interval = interval
+        self.subscribers: Set[Subscription] = set()
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.task: Optional[asyncio.Task] = None
+
+    async def run(self) -> None:
+        while True:
+            try:
+                stats = await self.stats_collection.find_one({"date": self.game_date}, {"_id": 0, "total_players": 1, "clause_stats": 1})
+                delta = self.diff(stats or {"total_players": 0, "clause_stats": {}})
+                if delta:
+                    self.publish(delta)
+            except Exception as e:
+                logger.error(f"Error polling live stats for {self.game_date}: {e}")
+            await asyncio.sleep(self.interval)
+
+    def diff(self, stats: dict) -> Optional[Dict[str, Any]]:
+        """Changes since the last published snapshot, or None if nothing moved"""
+        total_players = stats.get("total_players", 0)
+        current = {
+            clause_id: {
+                "found_count": clause_stat.get("found_count", 0),
+                "percentage": (clause_stat.get("found_count", 0) / total_players) * 100 if total_players > 0 else 0
+            }
+            for clause_id, clause_stat in stats.get("clause_stats", {}).items()
+        }
+        previous = self.snapshot or {"total_players": None, "clause_stats": {}}
+        changed = {
+            clause_id: clause_stat
+            for clause_id, clause_stat in current.items()
+            if previous["clause_stats"].get(clause_id) != clause_stat
+        }
+        self.snapshot = {"total_players": total_players, "clause_stats": current}
+        if total_players == previous["total_players"] and not changed:
+            return None
+        return {"date": self.game_date, "total_players": total_players, "clause_stats": changed}
+
+    def publish(self, delta: Dict[str, Any]) -> None:
+        for subscription in list(self.subscribers):
+            try:
+                subscription.queue.put_nowait(delta)
+            except asyncio.QueueFull:
+                # A client that cannot keep up is dropped rather than buffered
+                self.evict(subscription)
+
+    def evict(self, subscription: Subscription, slow: bool = True) -> None:
+        """Detach a subscriber and end its stream"""
+        subscription.evicted = slow
+        self.subscribers.discard(subscription)
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+
+
+class LiveStatsHub:
+    """Per-process registry of live stats channels, one polling task per date"""
+
+    def __init__(self, interval_ms: int = 1000, max_subscribers: int = 1000, queue_size: int = 8):
+        self.interval = interval_ms / 1000
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+        self.evictions = 0
+        self._channels: Dict[str, DateChannel] = {}
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(channel.subscribers) for channel in self._channels.values())
+
+    @property
+    def full(self) -> bool:
+        return self.subscriber_count >= self.max_subscribers
+
+    def subscribe(self, game_date: str, stats_collection: AsyncIOMotorCollection) -> Subscription:
+        """Register a subscriber for a date, starting its channel if needed"""
+        if self.full:
+            raise SubscriberLimitReached()
+
+        channel = self._channels.get(game_date)
+        if channel is None:
+            channel = DateChannel(game_date, stats_collection, self.interval)
+            channel.task = asyncio.create_task(channel.run())
+            self._channels[game_date] = channel
+
+        subscription = Subscription(game_date, self.queue_size)
+        if channel.snapshot is not None:
+            # Late joiners start from the current snapshot instead of waiting for a change
+            subscription.queue.put_nowait(dict(channel.snapshot, date=game_date))
+        channel.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscriber, stopping its channel once nobody listens"""
+        channel = self._channels.get(subscription.game_date)
+        if channel is None:
+            return
+        if subscription.evicted:
+            self.evictions += 1
+        channel.subscribers.discard(subscription)
+        if not channel.subscribers:
+            channel.task.cancel()
+            del self._channels[subscription.game_date]
+
+    def stats(self) -> Dict[str, Any]:
+        """Subscriber and channel counts"""
+        return {
+            "channels": len(self._channels),
+            "subscribers": self.subscriber_count,
+            "max_subscribers": self.max_subscribers,
+            "evictions": self.evictions,
+        }
+
+    async def stop(self) -> None:
+        """End every stream and cancel the polling tasks"""
+        for channel in list(self._channels.values()):
+            for subscription in list(channel.subscribers):
+                channel.evict(subscription, slow=False)
+            channel.task.cancel()
+        self._channels.clear()
+
+
+live_stats_hub = LiveStatsHub(
+    interval_ms=int(os.environ.get("LIVE_STATS_INTERVAL_MS", "1000")),
+    max_subscribers=int(os.environ.get("LIVE_STATS_MAX_SUBSCRIBERS", "1000")),
+    queue_size=int(os.environ.get("LIVE_STATS_QUEUE_SIZE", "8")),
+)
@@ -0,0 +1,175 @@
+"""Drive rollover-style traffic at the API and report latency percentiles
+
+Every simulated player fetches the day's game, submits a random selection
+of its clause ids and reads the stats. All players start together, so the
+first phase is the burst of GET /game/{date} seen at rollover.
+
+    python -m backend.loadtest --players 2000 --concurrency 200
+    python -m backend.loadtest --url http://localhost:8001 --baseline loadtest_results/previous.json
+
+Without --url the app runs in-process through an ASGI transport (with its
+lifespan, so MONGO_URL must point at a database). Each run is written to
+--output as JSON.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "loadtest_results")
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    # Rounded first so float noise (0.07 * 100 == 7.000000000000001) does not push the rank up
+    rank = max(math.ceil(round(fraction * len(sorted_values), 9)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class LoadRecorder:
+    """Collects per-endpoint latencies and status codes"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def request(self, client: httpx.AsyncClient, endpoint: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            response = None
+            status = type(e).__name__
+        self.latencies[endpoint].append((time.perf_counter() - started) * 1000)
+        self.statuses[endpoint][status] += 1
+        return response
+
+    def report(self, elapsed: float) -> Dict[str, Dict[str, Any]]:
+        endpoints = {}
+        for endpoint, latencies in self.latencies.items():
+            latencies = sorted(latencies)
+            errors = sum(count for status, count in self.statuses[endpoint].items() if not status.startswith("2"))
+            endpoints[endpoint] = {
+                "requests": len(latencies),
+                "errors": errors,
+                "statuses": dict(self.statuses[endpoint]),
+                "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+                "mean_ms": round(sum(latencies) / len(latencies), 2),
+                "p50_ms": round(percentile(latencies, 0.50), 2),
+                "p95_ms": round(percentile(latencies, 0.95), 2),
+                "p99_ms": round(percentile(latencies, 0.99), 2),
+                "max_ms": round(latencies[-1], 2),
+            }
+        return endpoints
+
+
+async def play(client: httpx.AsyncClient, recorder: LoadRecorder, game_date: str, semaphore: asyncio.Semaphore, rng: random.Random) -> None:
+    """One player's session: load the game, submit, read the stats"""
+    async with semaphore:
+        response = await recorder.request(client, "GET /game/{date}", "GET", f"/api/game/{game_date}")
+        if response is None or response.status_code != 200:
+            return
+        clause_ids = response.json()["quiz_order"]
+
+        selected = rng.sample(clause_ids, rng.randint(1, len(clause_ids)))
+        await recorder.request(client, "POST /game/submit", "POST", "/api/game/submit", json={
+            "game_date": game_date,
+            "session_id": f"loadtest-{uuid.uuid4()}",
+            "selected_clauses": selected,
+            "completion_time": rng.randint(20, 300),
+        })
+
+        await recorder.request(client, "GET /stats/{date}", "GET", f"/api/stats/{game_date}")
+
+
+async def run_players(client: httpx.AsyncClient, args: argparse.Namespace) -> Dict[str, Any]:
+    recorder = LoadRecorder()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    await asyncio.gather(*(play(client, recorder, args.date, semaphore, rng) for _ in range(args.players)))
+    elapsed = time.perf_counter() - started
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(sum(len(latencies) for latencies in recorder.latencies.values()) / elapsed, 1),
+        "endpoints": recorder.report(elapsed),
+    }
+
+
+async def run_load_test(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run the scenario in-process or against --url and return the report"""
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    timeout = httpx.Timeout(args.timeout)
+
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url.rstrip("/"), limits=limits, timeout=timeout) as client:
+            results = await run_players(client, args)
+    else:
+        from .server import app, lifespan
+
+        async with lifespan(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", limits=limits, timeout=timeout) as client:
+                results = await run_players(client, args)
+
+    return {
+        "started_at": datetime.utcnow().isoformat(),
+        "target": args.url or "in-process",
+        "date": args.date,
+        "players": args.players,
+        "concurrency": args.concurrency,
+        **results,
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    """Ratio of each endpoint's latency percentiles to the baseline run's"""
+    changes = {}
+    for endpoint, current in report["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(endpoint)
+        if not previous:
+            continue
+        changes[endpoint] = {
+            key: round(current[key] / previous[key], 2) if previous[key] else 0.0
+            for key in ("p50_ms", "p95_ms", "p99_ms")
+        }
+    return changes
+
+
+def main(args: argparse.Namespace) -> Dict[str, Any]:
+    report = asyncio.run(run_load_test(args))
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["compared_to"] = {"baseline": args.baseline, "ratios": compare(report, json.load(f))}
+
+    output = args.output or os.path.join(RESULTS_DIR, f"loadtest-{datetime.utcnow():%Y%m%dT%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    report["saved_to"] = output
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="base URL of a running server, e.g. http://localhost:8001; in-process if omitted")
+    parser.add_argument("--date", default=date.today().strftime("%Y-%m-%d"), help="game date to play (YYYY-MM-DD)")
+    parser.add_argument("--players", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, help="seed for the random selections")
+    parser.add_argument("--output", help=f"report path (default {RESULTS_DIR}/loadtest-<timestamp>.json)")
+    parser.add_argument("--baseline", help="earlier report to compare percentiles against")
+    print(json.dumps(main(parser.parse_args()), indent=2))
@@ -0,0 +1,189 @@
+"""Request and Mongo command metrics in the Prometheus text format
+
+Latencies go into fixed-bucket histograms, so recording a sample is a
+bisect and two additions and /metrics never has to sort raw samples.
+Requests are labelled by route template rather than by raw path, which
+keeps the number of series bounded.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from pymongo import monitoring
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Upper bounds in seconds; the +Inf bucket is implied
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+class Histogram:
+    """Cumulative-on-read latency histogram with fixed buckets"""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: object) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+def _render_histogram(lines: List[str], name: str, labels: str, histogram: Histogram) -> None:
+    cumulative = 0
+    for bound, count in zip(LATENCY_BUCKETS, histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+    lines.append(f"{name}_sum{{{labels}}} {histogram.sum:.6f}")
+    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+
+class RequestMetrics:
+    """Per-route latency, status counts and in-flight requests, updated on the event loop"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.latency: Dict[Tuple[str, str], Histogram] = defaultdict(Histogram)
+        self.responses: Dict[Tuple[str, str, int], int] = defaultdict(int)
+
+    def render(self, lines: List[str]) -> None:
+        lines.append("# HELP http_requests_in_flight Requests currently being handled")
+        lines.append("# TYPE http_requests_in_flight gauge")
+        lines.append(f"http_requests_in_flight {self.in_flight}")
+
+        lines.append("# HELP http_requests_total Responses by method, route template and status code")
+        lines.append("# TYPE http_requests_total counter")
+        for (method, route, status), count in sorted(self.responses.items()):
+            lines.append(f"http_requests_total{{{_labels(method=method, route=route, status=status)}}} {count}")
+
+        lines.append("# HELP http_request_duration_seconds Time from request start to the end of the response body")
+        lines.append("# TYPE http_request_duration_seconds histogram")
+        for (method, route), histogram in sorted(self.latency.items()):
+            _render_histogram(lines, "http_request_duration_seconds", _labels(method=method, route=route), histogram)
+
+
+class MetricsMiddleware:
+    """Plain ASGI middleware feeding request_metrics; avoids BaseHTTPMiddleware's per-request task"""
+
+    def __init__(self, app, metrics: "RequestMetrics" = None):
+        self.app = app
+        self.metrics = metrics or request_metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.in_flight -= 1
+            # The router stores the matched route in the shared scope; mounted apps add their prefix as root_path
+            route = scope.get("route")
+            path = scope.get("root_path", "") + route.path if route is not None else UNMATCHED_ROUTE
+            method = scope["method"]
+            metrics.latency[(method, path)].observe(elapsed)
+            metrics.responses[(method, path, status)] += 1
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Per-collection, per-command Mongo latency and failures, fed by pymongo's command events"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._collections: Dict[Tuple[object, int], str] = {}
+        self.latency: Dict[Tuple[str, str], Histogram] = defaultdict(Histogram)
+        self.failures: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    @staticmethod
+    def collection_of(event: monitoring.CommandStartedEvent) -> str:
+        """Collection a command targets, or the database name for database-level commands"""
+        command = event.command
+        target = command.get("collection") if event.command_name == "getMore" else command.get(event.command_name)
+        return target if isinstance(target, str) else event.database_name
+
+    def started(self, event):
+        collection = self.collection_of(event)
+        with self._lock:
+            self._collections[(event.connection_id, event.request_id)] = collection
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+    def _finish(self, event, failed: bool) -> None:
+        with self._lock:
+            collection = self._collections.pop((event.connection_id, event.request_id), event.database_name)
+            key = (collection, event.command_name)
+            self.latency[key].observe(event.duration_micros / 1e6)
+            if failed:
+                self.failures[key] += 1
+
+    def render(self, lines: List[str]) -> None:
+        with self._lock:
+            latency = sorted(self.latency.items())
+            failures = sorted(self.failures.items())
+
+        lines.append("# HELP mongo_command_duration_seconds Mongo command round trip by collection and command")
+        lines.append("# TYPE mongo_command_duration_seconds histogram")
+        for (collection, command), histogram in latency:
+            _render_histogram(lines, "mongo_command_duration_seconds", _labels(collection=collection, command=command), histogram)
+
+        lines.append("# HELP mongo_command_failures_total Failed Mongo commands by collection and command")
+        lines.append("# TYPE mongo_command_failures_total counter")
+        for (collection, command), count in failures:
+            lines.append(f"mongo_command_failures_total{{{_labels(collection=collection, command=command)}}} {count}")
+
+
+request_metrics = RequestMetrics()
+command_metrics = CommandMetrics()
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    from .database import pool_monitor
+
+    lines: List[str] = []
+    request_metrics.render(lines)
+    command_metrics.render(lines)
+
+    pool = pool_monitor.stats()
+    lines.append("# HELP mongo_pool_open_connections Connections currently open in the Mongo pool")
+    lines.append("# TYPE mongo_pool_open_connections gauge")
+    lines.append(f"mongo_pool_open_connections {pool['open_connections']}")
+    lines.append("# HELP mongo_pool_checkout_failures_total Connection checkouts that failed or timed out")
+    lines.append("# TYPE mongo_pool_checkout_failures_total counter")
+    lines.append(f"mongo_pool_checkout_failures_total {pool['checkout_failures']}")
+    return "\n".join(lines) + "\n"
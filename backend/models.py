@@ -69,4 +69,20 @@ class ScoreResponse(BaseModel):
     total_score: float
     max_score: int
     correct_answers: List[str]
-    legal_detector_breakdown: Dict[str, Any]
\ No newline at end of file
+    legal_detector_breakdown: Dict[str, Any]
+    percentile: Optional[float] = None  # share of earlier players today with a lower total score
+
+class StatusCheck(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    client_name: str
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
+
+class StatusCheckCreate(BaseModel):
+    client_name: str
+
+class StatusRollup(BaseModel):
+    client_name: str
+    hour: datetime
+    count: int
+    first_seen: datetime
+    last_seen: datetime
\ No newline at end of file
@@ -0,0 +1,221 @@
+"""Pre-render upcoming games to static JSON artifacts
+
+Run once from the repository root:
+
+    python -m backend.prerender --days 7
+
+or let the API do it on a schedule by setting PRERENDER_INTERVAL_MINUTES.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shutil
+import tempfile
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from .cache import content_version, prerendered_cache, read_content_version
+from .http_cache import CachedResponse, build_compressed_response, choose_encoding, game_last_modified, is_not_modified
+from .models import DailyGameResponse
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).parent
+PRERENDER_DIR = Path(os.environ.get("PRERENDER_DIR", ROOT_DIR / "prerendered"))
+
+# File suffix for each stored representation; None is the uncompressed body
+SUFFIXES = {None: ".json", "gzip": ".json.gz", "br": ".json.br"}
+
+
+class PrerenderedGame(CachedResponse):
+    """Validators for a game whose bodies live on disk, served as file responses"""
+
+    __slots__ = ("files",)
+
+    def __init__(self, etag: str, last_modified: Optional[datetime], files: Dict[Optional[str], tuple], fallback: bool = False):
+        super().__init__(b"", etag, last_modified, {name: b"" for name in files if name is not None}, fallback)
+        # encoding -> (path, os.stat_result)
+        self.files = files
+
+    def response(self, request: Request, cache_control: str) -> Response:
+        """File response for the best encoding, or an empty 304 if the client's copy is current"""
+        sizes = {name: stat_result.st_size for name, (_, stat_result) in self.files.items() if name is not None}
+        encoding = choose_encoding(request.headers.get("accept-encoding", ""), sizes)
+        headers = self.headers(cache_control, encoding)
+        etags = [self.etag] + [self.variant_etag(name) for name in sizes]
+        if is_not_modified(request, etags, self.last_modified):
+            return Response(status_code=304, headers=headers)
+        path, stat_result = self.files[encoding]
+        return FileResponse(path, headers=headers, media_type="application/json", stat_result=stat_result)
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    # A temp file of its own, so schedulers in several workers never write the same one
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp", delete=False) as tmp:
+        tmp.write(data)
+    try:
+        os.replace(tmp.name, path)
+    except OSError:
+        os.unlink(tmp.name)
+        raise
+
+
+def write_artifacts(game_date: str, cached: CachedResponse, version: int, directory: Path = PRERENDER_DIR) -> Dict[str, int]:
+    """Write every representation of a game, then its metadata, and return bytes per file"""
+    directory.mkdir(parents=True, exist_ok=True)
+    sizes = {}
+    for encoding, suffix in SUFFIXES.items():
+        body = cached.body if encoding is None else cached.encodings.get(encoding)
+        if body is None:
+            continue
+        _write_atomic(directory / f"{game_date}{suffix}", body)
+        sizes[encoding or "identity"] = len(body)
+
+    # The metadata file is written last, so its presence marks a complete artifact
+    meta = {
+        "etag": cached.etag,
+        "last_modified": cached.last_modified.isoformat() if cached.last_modified else None,
+        "encodings": sorted(name for name in sizes if name != "identity"),
+        "bytes": sizes,
+        "fallback": cached.fallback,
+        "content_version": version,
+    }
+    _write_atomic(directory / f"{game_date}.meta.json", json.dumps(meta).encode("utf-8"))
+    return sizes
+
+
+def load_prerendered(game_date: str, directory: Path = PRERENDER_DIR) -> Optional[PrerenderedGame]:
+    """Prerendered artifact for a date, or None if there is no complete one
+
+    Only the parsed metadata is cached. The files are stat'ed on every call
+    and checked against it, because another worker, the CLI or a migration
+    may rewrite or delete them at any time.
+    """
+    meta_path = directory / f"{game_date}.meta.json"
+    try:
+        meta_mtime = meta_path.stat().st_mtime_ns
+        cached = prerendered_cache.get(game_date)
+        if cached is None or cached[0] != meta_mtime:
+            cached = (meta_mtime, json.loads(meta_path.read_bytes()))
+            prerendered_cache.set(game_date, cached)
+        meta = cached[1]
+        if meta.get("content_version") != content_version.version:
+            # Rendered from content a migration has since replaced
+            return None
+
+        files = {}
+        for encoding in [None] + meta["encodings"]:
+            path = directory / f"{game_date}{SUFFIXES[encoding]}"
+            stat_result = path.stat()
+            if stat_result.st_size != meta["bytes"][encoding or "identity"] or stat_result.st_mtime_ns > meta_mtime:
+                # Rewritten after this metadata; serve from the database until the new metadata lands
+                return None
+            files[encoding] = (str(path), stat_result)
+    except (OSError, ValueError, KeyError):
+        prerendered_cache.invalidate(game_date)
+        return None
+
+    last_modified = datetime.fromisoformat(meta["last_modified"]) if meta["last_modified"] else None
+    return PrerenderedGame(meta["etag"], last_modified, files, meta.get("fallback", False))
+
+
+def remove_prerendered(game_date: Optional[str] = None, directory: Path = PRERENDER_DIR) -> None:
+    """Delete the artifacts for one date, or for every date"""
+    if game_date is None:
+        prerendered_cache.clear()
+        shutil.rmtree(directory, ignore_errors=True)
+        return
+    prerendered_cache.invalidate(game_date)
+    for suffix in list(SUFFIXES.values()) + [".meta.json"]:
+        try:
+            (directory / f"{game_date}{suffix}").unlink()
+        except FileNotFoundError:
+            pass
+
+
+async def prerender_games(db: AsyncIOMotorDatabase, start: date, days: int, directory: Path = PRERENDER_DIR) -> List[Dict[str, Any]]:
+    """Render the stored games for days dates starting at start"""
+    dates = [(start + timedelta(days=offset)).strftime("%Y-%m-%d") for offset in range(days)]
+    # Read before the games, so content replaced mid-render is tagged with the older version
+    version = await read_content_version(db)
+    games = await db.games.find({"date": {"$in": dates}}).to_list(len(dates))
+
+    report = []
+    for game_data in games:
+        cached = await build_compressed_response(DailyGameResponse(**game_data), game_last_modified(game_data))
+        cached.fallback = bool(game_data.get("fallback"))
+        sizes = await asyncio.to_thread(write_artifacts, game_data["date"], cached, version, directory)
+        prerendered_cache.invalidate(game_data["date"])
+        report.append({"date": game_data["date"], "etag": cached.etag, "bytes": sizes})
+
+    missing = sorted(set(dates) - {entry["date"] for entry in report})
+    if missing:
+        logger.warning(f"No stored game to prerender for {', '.join(missing)}")
+    logger.info(f"Prerendered {len(report)} of {len(dates)} games into {directory}")
+    return report
+
+
+class PrerenderScheduler:
+    """Re-renders the games for the next few days every interval_minutes inside the API process"""
+
+    def __init__(self, interval_minutes: int = 0, days: int = 7):
+        self.interval_minutes = interval_minutes
+        self.days = days
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, db: AsyncIOMotorDatabase) -> None:
+        """Start the schedule; an interval of 0 leaves it disabled"""
+        if self.interval_minutes > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self) -> None:
+        """Cancel the schedule"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, db: AsyncIOMotorDatabase) -> None:
+        while True:
+            try:
+                await prerender_games(db, datetime.now(timezone.utc).date(), self.days)
+            except Exception as e:
+                logger.error(f"Error prerendering games: {e}")
+            await asyncio.sleep(self.interval_minutes * 60)
+
+
+prerender_scheduler = PrerenderScheduler(
+    interval_minutes=int(os.environ.get("PRERENDER_INTERVAL_MINUTES", "0")),
+    days=int(os.environ.get("PRERENDER_DAYS", "7")),
+)
+
+
+async def main(args: argparse.Namespace) -> None:
+    from .database import connect_database, close_database
+
+    start = date.fromisoformat(args.start) if args.start else datetime.now(timezone.utc).date()
+    db = await connect_database()
+    try:
+        report = await prerender_games(db, start, args.days, Path(args.output))
+        print(json.dumps(report, indent=2))
+    finally:
+        await close_database()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-render upcoming games to static JSON artifacts")
+    parser.add_argument("--days", type=int, default=int(os.environ.get("PRERENDER_DAYS", "7")), help="number of dates to render")
+    parser.add_argument("--start", help="first date to render (YYYY-MM-DD, default today UTC)")
+    parser.add_argument("--output", default=str(PRERENDER_DIR), help="artifact directory")
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(main(parser.parse_args()))
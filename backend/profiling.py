@@ -0,0 +1,283 @@
+"""Opt-in per-request profiling written as collapsed-stack flamegraph files
+
+With PROFILING_ENABLED set, a request is profiled when it carries
+"X-Profile: 1" together with the admin token, or when it is picked by
+PROFILE_SAMPLE_RATE. pyinstrument is used when installed, since its
+async mode samples only the profiled request; otherwise cProfile records
+everything the event loop runs while the request is in flight.
+
+Each capture is a <name>.collapsed file ("frame;frame;frame weight_us",
+readable by flamegraph.pl, speedscope or inferno) and a <name>.json with
+the request, its timings and the Mongo commands it awaited. Only the
+newest PROFILE_MAX_CAPTURES are kept in PROFILE_DIR. With profiling
+disabled, neither the middleware nor the command listener is installed.
+"""
+import asyncio
+import cProfile
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+from starlette.requests import Request
+
+from .admin import is_admin_request
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+except ImportError:  # pyinstrument is optional
+    SamplingProfiler = None
+
+logger = logging.getLogger(__name__)
+
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_MAX_CAPTURES = int(os.environ.get("PROFILE_MAX_CAPTURES", "50"))
+PROFILE_DIR = Path(os.environ.get("PROFILE_DIR", Path(__file__).parent / "profiles"))
+PROFILE_HEADER = b"x-profile"
+
+# Deepest call chain expanded when rebuilding stacks from cProfile's caller graph
+MAX_STACK_DEPTH = 64
+MIN_WEIGHT_US = 10
+
+
+class Capture:
+    """Mongo commands awaited by one profiled request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.pending: Dict[Tuple[object, int], Tuple[str, str, float]] = {}
+        self.spans: List[Dict[str, Any]] = []
+
+
+_current_capture: ContextVar[Optional[Capture]] = ContextVar("profiling_capture", default=None)
+
+
+class MongoSpanListener(monitoring.CommandListener):
+    """Attributes Mongo commands to the profiled request whose context issued them
+
+    Motor runs driver calls with a copy of the caller's context, so the
+    capture set by the middleware is visible on the driver thread.
+    """
+
+    def started(self, event):
+        capture = _current_capture.get()
+        if capture is not None:
+            target = event.command.get(event.command_name)
+            collection = target if isinstance(target, str) else event.database_name
+            capture.pending[(event.connection_id, event.request_id)] = (collection, event.command_name, time.perf_counter())
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+    def _finish(self, event, failed: bool) -> None:
+        capture = _current_capture.get()
+        if capture is None:
+            return
+        pending = capture.pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        collection, command_name, started = pending
+        capture.spans.append({
+            "collection": collection,
+            "command": command_name,
+            "offset_ms": round((started - capture.started) * 1000, 3),
+            "duration_ms": round(event.duration_micros / 1000, 3),
+            "failed": failed,
+        })
+
+
+mongo_span_listener = MongoSpanListener()
+
+
+def _cprofile_label(function: tuple) -> str:
+    filename, line_no, name = function
+    return name if filename == "~" else f"{name} ({os.path.basename(filename)}:{line_no})"
+
+
+def collapse_cprofile(profile: cProfile.Profile) -> Dict[str, int]:
+    """Approximate call stacks from cProfile's caller graph, weighted in microseconds
+
+    cProfile only keeps caller -> callee totals, so a function's self time is
+    split across its call paths in proportion to the time each caller spent
+    in it.
+    """
+    stats = pstats.Stats(profile).stats
+    callees: Dict[tuple, List[Tuple[tuple, float]]] = {}
+    for function, (_, _, _, _, callers) in stats.items():
+        for caller, (_, _, _, caller_cumulative) in callers.items():
+            callees.setdefault(caller, []).append((function, caller_cumulative))
+
+    stacks: Dict[str, int] = {}
+
+    def walk(function: tuple, path: Tuple[tuple, ...], share: float) -> None:
+        _, _, self_time, cumulative, _ = stats[function]
+        path = path + (function,)
+        weight = int(self_time * share * 1e6)
+        if weight:
+            key = ";".join(_cprofile_label(frame) for frame in path)
+            stacks[key] = stacks.get(key, 0) + weight
+        # Paths worth less than MIN_WEIGHT_US are dropped, which keeps the expansion small
+        if len(path) >= MAX_STACK_DEPTH or cumulative * share * 1e6 < MIN_WEIGHT_US:
+            return
+        for callee, callee_cumulative in callees.get(function, ()):
+            if callee not in path and stats[callee][3]:
+                walk(callee, path, share * callee_cumulative / stats[callee][3])
+
+    for function, (_, _, _, _, callers) in stats.items():
+        if not callers:
+            walk(function, (), 1.0)
+    return stacks
+
+
+def collapse_pyinstrument(profiler) -> Dict[str, int]:
+    """Stacks from a pyinstrument session's frame tree, weighted in microseconds"""
+    stacks: Dict[str, int] = {}
+
+    def walk(frame, path: List[str]) -> None:
+        label = frame.function if not frame.file_path_short else f"{frame.function} ({frame.file_path_short}:{frame.line_no})"
+        path = path + [label]
+        self_time = frame.time - sum(child.time for child in frame.children)
+        if self_time > 0:
+            key = ";".join(path)
+            stacks[key] = stacks.get(key, 0) + int(self_time * 1e6)
+        for child in frame.children:
+            walk(child, path)
+
+    root = profiler.last_session.root_frame() if profiler.last_session else None
+    if root is not None:
+        walk(root, [])
+    return stacks
+
+
+def _prune(directory: Path, keep: int) -> None:
+    captures = sorted(directory.glob("*.json"), key=lambda path: path.stat().st_mtime)
+    for meta in captures[:max(len(captures) - keep, 0)]:
+        meta.unlink(missing_ok=True)
+        meta.with_suffix(".collapsed").unlink(missing_ok=True)
+
+
+def write_capture(meta: Dict[str, Any], stacks: Dict[str, int], directory: Path = PROFILE_DIR, keep: int = PROFILE_MAX_CAPTURES) -> None:
+    """Write one capture's collapsed stacks and metadata, then drop the oldest captures"""
+    directory.mkdir(parents=True, exist_ok=True)
+    # Awaited Mongo time shows up as its own towers next to the CPU stacks
+    for span in meta["mongo_spans"]:
+        key = f"[mongo awaited];{span['command']} {span['collection']}"
+        stacks[key] = stacks.get(key, 0) + int(span["duration_ms"] * 1000)
+
+    lines = [f"{stack} {weight}" for stack, weight in sorted(stacks.items())]
+    (directory / f"{meta['name']}.collapsed").write_text("\n".join(lines) + "\n")
+    # The metadata file is written last, so listing only sees complete captures
+    (directory / f"{meta['name']}.json").write_text(json.dumps(meta, indent=2))
+    _prune(directory, keep)
+
+
+def list_captures(directory: Path = PROFILE_DIR, limit: int = 50) -> List[Dict[str, Any]]:
+    """Metadata of the most recent captures, newest first"""
+    if not directory.is_dir():
+        return []
+    captures = sorted(directory.glob("*.json"), key=lambda path: path.stat().st_mtime, reverse=True)
+    listed = []
+    for meta in captures[:limit]:
+        try:
+            listed.append(json.loads(meta.read_text()))
+        except (OSError, ValueError):
+            continue
+    return listed
+
+
+def capture_path(name: str, directory: Path = PROFILE_DIR) -> Optional[Path]:
+    """Collapsed-stack file for a capture name, or None if it does not exist"""
+    if not re.fullmatch(r"[\w.-]+", name):
+        return None
+    path = directory / f"{name}.collapsed"
+    return path if path.is_file() else None
+
+
+class ProfilingMiddleware:
+    """Profiles admin-requested or sampled requests; installed only when PROFILING_ENABLED"""
+
+    def __init__(self, app, sample_rate: float = PROFILE_SAMPLE_RATE):
+        self.app = app
+        self.sample_rate = sample_rate
+        self._cprofile_busy = False
+
+    def wants_profile(self, scope) -> bool:
+        if self.sample_rate and random.random() < self.sample_rate:
+            return True
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return value == b"1" and is_admin_request(Request(scope))
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        use_cprofile = SamplingProfiler is None
+        if use_cprofile and self._cprofile_busy:
+            # Only one cProfile profiler can be active in a process at a time
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        capture = Capture()
+        token = _current_capture.set(capture)
+        if use_cprofile:
+            self._cprofile_busy = True
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            profiler = SamplingProfiler(async_mode="enabled")
+            profiler.start()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            if use_cprofile:
+                profiler.disable()
+                self._cprofile_busy = False
+            else:
+                profiler.stop()
+            _current_capture.reset(token)
+            await self.save(scope, status, capture, profiler, use_cprofile)
+
+    async def save(self, scope, status: int, capture: Capture, profiler, use_cprofile: bool) -> None:
+        elapsed_ms = (time.perf_counter() - capture.started) * 1000
+        route = getattr(scope.get("route"), "path", scope["path"])
+        slug = re.sub(r"\W+", "_", route).strip("_")
+        meta = {
+            "name": f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{scope['method']}-{slug}",
+            "captured_at": datetime.utcnow().isoformat(),
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": route,
+            "status": status,
+            "duration_ms": round(elapsed_ms, 3),
+            "profiler": "cProfile" if use_cprofile else "pyinstrument",
+            "mongo_ms": round(sum(span["duration_ms"] for span in capture.spans), 3),
+            "mongo_spans": capture.spans,
+        }
+        collapse = collapse_cprofile if use_cprofile else collapse_pyinstrument
+        try:
+            await asyncio.to_thread(lambda: write_capture(meta, collapse(profiler)))
+        except Exception as e:
+            logger.error(f"Error writing profile for {scope['method']} {scope['path']}: {e}")
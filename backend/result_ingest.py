@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import os
+from typing import List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+
+class ResultIngestor:
+    """Bounded queue that writes game results with batched insert_many calls
+
+    Each submission waits until the batch holding its document has been
+    written, so callers only acknowledge durable results. A batch is written
+    once it holds max_batch_size documents or its oldest document has waited
+    max_delay_ms. When max_queue_size documents are waiting, new submissions
+    block until the writer catches up.
+    """
+
+    def __init__(self, enabled: bool = True, max_batch_size: int = 100, max_delay_ms: int = 5, max_queue_size: int = 10000):
+        self.enabled = enabled
+        self.max_batch_size = max_batch_size
+        self.max_delay_ms = max_delay_ms
+        self.max_queue_size = max_queue_size
+        self.batches_written = 0
+        self.documents_written = 0
+        self._results_collection: Optional[AsyncIOMotorCollection] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self, results_collection: AsyncIOMotorCollection) -> None:
+        """Start the background batch writer"""
+        self._results_collection = results_collection
+        if self.enabled and self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop accepting documents and write everything still queued"""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        await self._queue.put(None)
+        await task
+
+    async def submit(self, document: dict, results_collection: AsyncIOMotorCollection) -> None:
+        """Queue a result document and wait until it has been written"""
+        if not self.running:
+            await results_collection.insert_one(document)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((document, future))
+        await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                await self._drain()
+                return
+
+            batch = [item]
+            deadline = loop.time() + self.max_delay_ms / 1000
+            stopping = False
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._write(batch)
+            if stopping:
+                await self._drain()
+                return
+
+    async def _drain(self) -> None:
+        # Submitters blocked on a full queue enqueue while batches are written,
+        # so keep going until the queue stays empty after the last write
+        while True:
+            batch = []
+            while not self._queue.empty() and len(batch) < self.max_batch_size:
+                item = self._queue.get_nowait()
+                if item is not None:
+                    batch.append(item)
+            if batch:
+                await self._write(batch)
+                continue
+            # Let submitters woken by the gets above put their documents
+            await asyncio.sleep(0)
+            if self._queue.empty():
+                return
+
+    async def _write(self, batch: List[Tuple[dict, asyncio.Future]]) -> None:
+        failed = {}
+        try:
+            await self._results_collection.insert_many([document for document, _ in batch], ordered=False)
+        except BulkWriteError as e:
+            failed = {error["index"]: e for error in e.details.get("writeErrors", [])}
+        except Exception as e:
+            logger.error(f"Error writing game result batch: {e}")
+            failed = {index: e for index in range(len(batch))}
+
+        self.batches_written += 1
+        self.documents_written += len(batch) - len(failed)
+        for index, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if index in failed:
+                future.set_exception(failed[index])
+            else:
+                future.set_result(None)
+
+
+result_ingestor = ResultIngestor(
+    enabled=os.environ.get("RESULT_BATCH_INGEST", "true").lower() in ("1", "true", "yes"),
+    max_batch_size=int(os.environ.get("RESULT_BATCH_SIZE", "100")),
+    max_delay_ms=int(os.environ.get("RESULT_BATCH_MAX_DELAY_MS", "5")),
+    max_queue_size=int(os.environ.get("RESULT_QUEUE_SIZE", "10000")),
+)
@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import FileResponse
+from typing import Optional
+from ..admin import require_admin
+from ..content_import import IMPORT_BATCH_SIZE, import_stream
+from ..database import get_database
+from ..profiling import capture_path, list_captures
+from ..slow_queries import slow_query_log
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+
+@router.get("/slow-queries")
+async def get_slow_queries(
+    limit: int = Query(10, ge=1, le=100),
+    by: str = Query("max_ms", pattern="^(max_ms|total_ms|count)$"),
+    recent: int = Query(20, ge=0, le=200)
+):
+    """Get the slowest Mongo query shapes with their plans, and the latest slow operations"""
+    return {
+        "threshold_ms": slow_query_log.threshold_ms,
+        "shapes": slow_query_log.top(limit, by),
+        "recent": slow_query_log.recent_entries(recent) if recent else [],
+    }
+
+@router.get("/profiles")
+async def get_profiles(limit: int = Query(50, ge=1, le=500)):
+    """List recent request profiles, newest first"""
+    return list_captures(limit=limit)
+
+@router.get("/profiles/{name}")
+async def get_profile(name: str):
+    """Download a profile's collapsed stacks for flamegraph tools"""
+    path = capture_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=path.name)
+
+@router.post("/import")
+async def import_content(
+    request: Request,
+    source: str = Query(..., description="Name for this import's checkpoint; resending under the same name resumes it"),
+    fingerprint: Optional[str] = Query(None, description="Identifies the file content, e.g. its hash; a different value starts over"),
+    resume: bool = True,
+    batch_size: int = Query(IMPORT_BATCH_SIZE, ge=1, le=10000)
+):
+    """Stream games from an NDJSON or JSON array request body into the games collection"""
+    try:
+        db = await get_database()
+        return await import_stream(db, request.stream(), f"upload:{source}", fingerprint, batch_size, resume)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error importing content from {source}: {e}")
+        raise HTTPException(status_code=500, detail="Import failed")
@@ -1,18 +1,34 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from datetime import datetime, date
-from typing import List, Optional
+from typing import Iterable, List, Optional
 from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from ..models import (
-    GameData, GameDataCreate, GameResult, GameResultCreate, 
-    GameStats, DailyGameResponse, ScoreResponse, UserAnswer
+    GameData, GameDataCreate, GameResultCreate,
+    GameStats, DailyGameResponse, ScoreResponse
 )
 from ..database import get_database
+from ..cache import game_cache, scoring_cache, stats_cache, content_version, invalidate_game, SingleFlight
+from ..scoring import CompiledGame
+from ..stats_aggregator import stats_aggregator
+from ..result_ingest import result_ingestor
+from ..http_cache import CachedResponse, build_cached_response, build_compressed_response, game_cache_control, game_last_modified
+from ..prerender import load_prerendered, remove_prerendered
+from ..serialization import FAST_JSON, json_response
+from ..score_histogram import record_score, distribution
+from ..admin import is_admin_request
 import logging
+import os
+import uuid
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Stats change with every submission, so clients may only reuse them briefly
+STATS_CACHE_CONTROL = f"public, max-age={int(os.environ.get('STATS_MAX_AGE', '5'))}"
+
 async def get_games_collection() -> AsyncIOMotorCollection:
     db = await get_database()
     return db.games
@@ -25,9 +41,14 @@ async def get_stats_collection() -> AsyncIOMotorCollection:
     db = await get_database()
     return db.game_stats
 
+async def get_histograms_collection() -> AsyncIOMotorCollection:
+    db = await get_database()
+    return db.score_histograms
+
 @router.get("/game/{game_date}", response_model=DailyGameResponse)
 async def get_daily_game(
     game_date: str,
+    request: Request,
     games_collection: AsyncIOMotorCollection = Depends(get_games_collection)
 ):
     """Get daily game content for a specific date"""
@@ -35,14 +56,13 @@ async def get_daily_game(
         # Validate date format
         datetime.strptime(game_date, "%Y-%m-%d")
         
-        game_data = await games_collection.find_one({"date": game_date})
+        await content_version.check(games_collection.database)
+        cached = game_cache.get(game_date) or load_prerendered(game_date)
+        if cached is None:
+            # Concurrent misses for a date (e.g. at rollover or TTL expiry) share one load
+            cached = await _game_loads.run(game_date, lambda: load_game_response(game_date, games_collection))
         
-        if not game_data:
-            # If no game data exists for this date, create default/fallback game
-            fallback_game = await create_fallback_game(game_date, games_collection)
-            return DailyGameResponse(**fallback_game)
-        
-        return DailyGameResponse(**game_data)
+        return cached.response(request, game_cache_control(game_date, fallback=cached.fallback))
     
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
@@ -50,6 +70,21 @@ async def get_daily_game(
         logger.error(f"Error fetching daily game: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch daily game")
 
+_game_loads = SingleFlight()
+
+async def load_game_response(game_date: str, games_collection: AsyncIOMotorCollection) -> CachedResponse:
+    """Read or create the game for a date, serialize it and cache the result"""
+    game_data = await games_collection.find_one({"date": game_date})
+    
+    if not game_data:
+        # If no game data exists for this date, create default/fallback game
+        game_data = await create_fallback_game(game_date, games_collection)
+    
+    cached = await build_compressed_response(DailyGameResponse(**game_data), game_last_modified(game_data))
+    cached.fallback = bool(game_data.get("fallback"))
+    game_cache.set(game_date, cached)
+    return cached
+
 @router.post("/game", response_model=GameData)
 async def create_game(
     game_create: GameDataCreate,
@@ -64,7 +99,13 @@ async def create_game(
         
         game_data = GameData(**game_create.dict())
         await games_collection.insert_one(game_data.dict())
+        invalidate_game(game_data.date)
+        remove_prerendered(game_data.date)
+        # Serialize and compress once now rather than on the first player's request
+        game_cache.set(game_data.date, await build_compressed_response(DailyGameResponse(**game_data.dict()), game_last_modified(game_data.dict())))
         
+        if FAST_JSON:
+            return json_response(game_data)
         return game_data
     
     except Exception as e:
@@ -76,25 +117,24 @@ async def submit_game_result(
     result_create: GameResultCreate,
     games_collection: AsyncIOMotorCollection = Depends(get_games_collection),
     results_collection: AsyncIOMotorCollection = Depends(get_results_collection),
-    stats_collection: AsyncIOMotorCollection = Depends(get_stats_collection)
+    stats_collection: AsyncIOMotorCollection = Depends(get_stats_collection),
+    histograms_collection: AsyncIOMotorCollection = Depends(get_histograms_collection)
 ):
     """Submit game results and calculate score"""
     try:
-        # Get the game data for scoring
-        game_data = await games_collection.find_one({"date": result_create.game_date})
-        if not game_data:
+        # Get the compiled scoring index for the game
+        game = await get_compiled_game(result_create.game_date, games_collection)
+        if not game:
             raise HTTPException(status_code=404, detail="Game not found for this date")
         
-        # Calculate score
-        real_clause_ids = [clause["id"] for clause in game_data["real_absurd_clauses"]]
         selected_clauses = result_create.selected_clauses
         
         # Base score calculation
-        correct_answers = [clause_id for clause_id in selected_clauses if clause_id in real_clause_ids]
+        correct_answers = game.correct_answers(selected_clauses)
         base_score = len(correct_answers)
         
-        # Get current stats for Legal Detector bonus
-        current_stats = await get_or_create_stats(result_create.game_date, stats_collection)
+        # Count this submission and get the previous stats for Legal Detector bonus
+        current_stats = await update_game_stats(result_create.game_date, selected_clauses, game.real_clause_ids, stats_collection)
         
         # Calculate bonus score based on rarity
         bonus_score = 0.0
@@ -132,80 +172,108 @@ async def submit_game_result(
         
         total_score = base_score + bonus_score
         
-        # Create user answers for storage
-        all_clauses = game_data["real_absurd_clauses"] + game_data["fake_absurd_clauses"]
-        user_answers = []
-        
-        for clause_id in game_data["quiz_order"]:
-            clause = next((c for c in all_clauses if c["id"] == clause_id), None)
-            if clause:
-                is_real = clause_id in real_clause_ids
-                was_selected = clause_id in selected_clauses
-                correct = (is_real and was_selected) or (not is_real and not was_selected)
-                
-                user_answers.append(UserAnswer(
-                    clause_id=clause_id,
-                    was_selected=was_selected,
-                    is_real=is_real,
-                    correct=correct
-                ))
-        
-        # Create game result
-        game_result = GameResult(
-            game_date=result_create.game_date,
-            session_id=result_create.session_id,
-            selected_clauses=selected_clauses,
-            score={"base": base_score, "bonus": bonus_score, "total": total_score},
-            user_answers=user_answers,
-            completion_time=result_create.completion_time
-        )
-        
-        # Save result to database
-        await results_collection.insert_one(game_result.dict())
+        # Build the stored document directly; it has the same shape as GameResult.dict()
+        result_document = {
+            "id": str(uuid.uuid4()),
+            "game_date": result_create.game_date,
+            "user_id": None,
+            "session_id": result_create.session_id,
+            "selected_clauses": selected_clauses,
+            "score": {"base": float(base_score), "bonus": bonus_score, "total": float(total_score)},
+            "user_answers": game.user_answers(selected_clauses),
+            "completion_time": result_create.completion_time,
+            "submitted_at": datetime.utcnow()
+        }
         
-        # Update statistics
-        await update_game_stats(result_create.game_date, selected_clauses, real_clause_ids, stats_collection)
+        # Save result to database (batched with other submissions)
+        await result_ingestor.submit(result_document, results_collection)
+        # Only count the score in the histogram once the result is stored
+        percentile = await record_score(result_create.game_date, total_score, histograms_collection)
         
-        return ScoreResponse(
-            base_score=base_score,
-            bonus_score=bonus_score,
-            total_score=total_score,
-            max_score=5,
-            correct_answers=correct_answers,
-            legal_detector_breakdown=legal_detector_breakdown
-        )
+        score = {
+            "base_score": base_score,
+            "bonus_score": bonus_score,
+            "total_score": total_score,
+            "max_score": 5,
+            "correct_answers": correct_answers,
+            "legal_detector_breakdown": legal_detector_breakdown,
+            "percentile": percentile
+        }
+        if FAST_JSON:
+            return json_response(score)
+        return ScoreResponse(**score)
     
     except Exception as e:
         logger.error(f"Error submitting game result: {e}")
         raise HTTPException(status_code=500, detail="Failed to submit game result")
 
+@router.get("/game-cache/stats")
+async def get_game_cache_stats():
+    """Get hit/miss counters for the in-process game and stats caches"""
+    return {**game_cache.stats(), "stats_cache": stats_cache.stats()}
+
+@router.get("/game-cache/compression")
+async def get_game_compression_report():
+    """Get body size and compression ratio per encoding for each cached game"""
+    return {game_date: cached.compression_report() for game_date, cached in game_cache.items()}
+
+@router.get("/stats/{game_date}/distribution")
+async def get_score_distribution(
+    game_date: str,
+    histograms_collection: AsyncIOMotorCollection = Depends(get_histograms_collection)
+):
+    """Get the score histogram for a specific date"""
+    try:
+        histogram = await histograms_collection.find_one({"date": game_date}, {"_id": 0})
+        return distribution(game_date, histogram)
+    
+    except Exception as e:
+        logger.error(f"Error fetching score distribution: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch score distribution")
+
 @router.get("/stats/{game_date}")
 async def get_game_stats(
     game_date: str,
+    request: Request,
     stats_collection: AsyncIOMotorCollection = Depends(get_stats_collection)
 ):
     """Get game statistics for a specific date"""
     try:
-        stats = await stats_collection.find_one({"date": game_date})
-        if not stats:
-            return {"date": game_date, "total_players": 0, "clause_stats": {}, "average_score": 0.0}
+        if is_admin_request(request):
+            # Admins always see the current document
+            cached = await load_stats_response(game_date, stats_collection)
+        else:
+            cached = await stats_cache.get(game_date, lambda: load_stats_response(game_date, stats_collection))
         
-        # Remove MongoDB ObjectId to avoid serialization issues
-        if "_id" in stats:
-            del stats["_id"]
-        
-        return stats
+        return cached.response(request, STATS_CACHE_CONTROL)
     
     except Exception as e:
         logger.error(f"Error fetching game stats: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch game stats")
 
-async def create_fallback_game(game_date: str, games_collection: AsyncIOMotorCollection) -> dict:
-    """Create a fallback game if no game exists for the date"""
-    fallback_game_data = {
-        "date": game_date,
-        "title": "Terms of Service for Interdimensional Pet Adoption Co.",
-        "tc_text": """TERMS OF SERVICE - INTERDIMENSIONAL PET ADOPTION CO.
+async def load_stats_response(game_date: str, stats_collection: AsyncIOMotorCollection) -> CachedResponse:
+    """Read the stats document for a date and serialize it with its validators"""
+    stats = await stats_collection.find_one({"date": game_date}, {"_id": 0})
+    if not stats:
+        stats = empty_stats(game_date)
+    return build_cached_response(with_percentages(stats), stats.get("last_updated"))
+
+async def get_compiled_game(game_date: str, games_collection: AsyncIOMotorCollection) -> Optional[CompiledGame]:
+    """Get the cached scoring index for a date, compiling it on first use"""
+    await content_version.check(games_collection.database)
+    game = scoring_cache.get(game_date)
+    if game is None:
+        game_data = await games_collection.find_one({"date": game_date})
+        if not game_data:
+            return None
+        game = CompiledGame(game_data)
+        scoring_cache.set(game_date, game)
+    return game
+
+# Content served for any date that has no game loaded
+FALLBACK_GAME_TEMPLATE = {
+    "title": "Terms of Service for Interdimensional Pet Adoption Co.",
+    "tc_text": """TERMS OF SERVICE - INTERDIMENSIONAL PET ADOPTION CO.
 
 1. ACCEPTANCE OF TERMS
 By accessing or using the services provided by Interdimensional Pet Adoption Co. ("Company"), you agree to be bound by these Terms of Service. If you do not agree to these terms, please do not use our services.
@@ -236,79 +304,94 @@ Either party may terminate this agreement with 30 days notice, unless terminatio
 
 10. ENTIRE AGREEMENT
 This document constitutes the entire agreement between the parties and supersedes all prior negotiations, representations, or agreements relating to the subject matter herein.""",
-        "real_absurd_clauses": [
-            {"id": "rac1", "text": "By proceeding, user agrees to an annual mandatory glitter tax, payable in actual glitter, which will be collected by our interdimensional revenue agents during the third lunar eclipse of each fiscal year."},
-            {"id": "rac2", "text": "The company reserves the right to re-theme your emotional support animal as a corporate mascot without prior notice, including but not limited to costume changes, promotional appearances, and social media campaigns."},
-            {"id": "rac3", "text": "All pets adopted through our service are subject to our mandatory cuddle quotas as outlined in Schedule A, which requires a minimum of 47 hugs per day per pet, monitored by our emotion-sensing surveillance drones."},
-            {"id": "rac4", "text": "Either party may terminate this agreement with 30 days notice, unless termination occurs during a mercury retrograde period, in which case 90 days notice is required."},
-            {"id": "rac5", "text": "Users must provide accurate information about their dimensional coordinates and temporal stability ratings."}
-        ],
-        "fake_absurd_clauses": [
-            {"id": "fac1", "text": "Participation in this service implies consent to occasional unsolicited serenades by our customer support team, performed in interpretive dance format during business hours."},
-            {"id": "fac2", "text": "Users are prohibited from discussing the color purple on Tuesdays within a 50-mile radius of any Company facility, as this may disturb our psychic pets."},
-            {"id": "fac3", "text": "All adopted pets must be taught to respond to their names backwards, and owners must address them only in whispers during the full moon."},
-            {"id": "fac4", "text": "The Company reserves the right to replace any adopted pet with a holographic duplicate if the original pet achieves sentience beyond Level 7 consciousness."},
-            {"id": "fac5", "text": "Users agree to submit monthly reports detailing their pet's dreams, transcribed in iambic pentameter and submitted via carrier pigeon only."}
-        ],
-        "quiz_order": ["rac1", "fac2", "rac3", "fac1", "rac2", "fac4", "rac4", "rac5", "fac5", "fac3"]
+    "real_absurd_clauses": [
+        {"id": "rac1", "text": "By proceeding, user agrees to an annual mandatory glitter tax, payable in actual glitter, which will be collected by our interdimensional revenue agents during the third lunar eclipse of each fiscal year."},
+        {"id": "rac2", "text": "The company reserves the right to re-theme your emotional support animal as a corporate mascot without prior notice, including but not limited to costume changes, promotional appearances, and social media campaigns."},
+        {"id": "rac3", "text": "All pets adopted through our service are subject to our mandatory cuddle quotas as outlined in Schedule A, which requires a minimum of 47 hugs per day per pet, monitored by our emotion-sensing surveillance drones."},
+        {"id": "rac4", "text": "Either party may terminate this agreement with 30 days notice, unless termination occurs during a mercury retrograde period, in which case 90 days notice is required."},
+        {"id": "rac5", "text": "Users must provide accurate information about their dimensional coordinates and temporal stability ratings."}
+    ],
+    "fake_absurd_clauses": [
+        {"id": "fac1", "text": "Participation in this service implies consent to occasional unsolicited serenades by our customer support team, performed in interpretive dance format during business hours."},
+        {"id": "fac2", "text": "Users are prohibited from discussing the color purple on Tuesdays within a 50-mile radius of any Company facility, as this may disturb our psychic pets."},
+        {"id": "fac3", "text": "All adopted pets must be taught to respond to their names backwards, and owners must address them only in whispers during the full moon."},
+        {"id": "fac4", "text": "The Company reserves the right to replace any adopted pet with a holographic duplicate if the original pet achieves sentience beyond Level 7 consciousness."},
+        {"id": "fac5", "text": "Users agree to submit monthly reports detailing their pet's dreams, transcribed in iambic pentameter and submitted via carrier pigeon only."}
+    ],
+    "quiz_order": ["rac1", "fac2", "rac3", "fac1", "rac2", "fac4", "rac4", "rac5", "fac5", "fac3"]
+}
+
+# Stored document for the fallback game, built once; only id, date and created_at vary
+FALLBACK_GAME_DOCUMENT = GameData(date="", **FALLBACK_GAME_TEMPLATE).dict(exclude={"id", "date", "created_at"})
+
+_fallback_creations = SingleFlight()
+
+async def create_fallback_game(game_date: str, games_collection: AsyncIOMotorCollection) -> dict:
+    """Create a fallback game if no game exists for the date
+
+    Concurrent misses for the same date in this process share one creation,
+    and the upsert on date keeps other processes from inserting a second copy.
+    """
+    return await _fallback_creations.run(game_date, lambda: upsert_fallback_game(game_date, games_collection))
+
+async def upsert_fallback_game(game_date: str, games_collection: AsyncIOMotorCollection) -> dict:
+    """Insert the fallback game for a date unless some game already exists"""
+    # Flagged so it is never served as cacheable, and cleared when real content replaces it
+    document = dict(FALLBACK_GAME_DOCUMENT, id=str(uuid.uuid4()), date=game_date, created_at=datetime.utcnow(), fallback=True)
+    try:
+        return await games_collection.find_one_and_update(
+            {"date": game_date},
+            {"$setOnInsert": document},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # Another process upserted the same date between our match and insert
+        return await games_collection.find_one({"date": game_date})
+
+def empty_stats(game_date: str) -> dict:
+    """Stats document for a date nobody has played yet"""
+    return {
+        "date": game_date,
+        "total_players": 0,
+        "clause_stats": {},
+        "average_score": 0.0
     }
-    
-    # Save fallback game to database
-    game_data = GameData(**fallback_game_data)
-    await games_collection.insert_one(game_data.dict())
-    
-    return fallback_game_data
 
-async def get_or_create_stats(game_date: str, stats_collection: AsyncIOMotorCollection) -> dict:
-    """Get existing stats or create new stats entry for a date"""
-    stats = await stats_collection.find_one({"date": game_date})
-    if not stats:
-        stats = {
-            "date": game_date,
-            "total_players": 0,
-            "clause_stats": {},
-            "average_score": 0.0
-        }
+def with_percentages(stats: dict) -> dict:
+    """Derive per-clause total_players and percentage from the stored counters"""
+    total_players = stats.get("total_players", 0)
+    for clause_stat in stats.get("clause_stats", {}).values():
+        found_count = clause_stat.get("found_count", 0)
+        clause_stat["total_players"] = total_players
+        clause_stat["percentage"] = (found_count / total_players) * 100 if total_players > 0 else 0
     return stats
 
-async def update_game_stats(game_date: str, selected_clauses: List[str], real_clause_ids: List[str], stats_collection: AsyncIOMotorCollection):
-    """Update game statistics after a player submits results"""
+async def update_game_stats(game_date: str, selected_clauses: List[str], real_clause_ids: Iterable[str], stats_collection: AsyncIOMotorCollection) -> dict:
+    """Atomically count a submission and return the stats as they were before it"""
     try:
-        stats = await get_or_create_stats(game_date, stats_collection)
-        
-        # Increment total players
-        stats["total_players"] += 1
+        if stats_aggregator.enabled:
+            return with_percentages(await stats_aggregator.record(game_date, selected_clauses, real_clause_ids, stats_collection))
         
-        # Update clause statistics
-        if "clause_stats" not in stats:
-            stats["clause_stats"] = {}
-        
-        # Update stats for all real clauses
+        selected = set(selected_clauses)
+        increments = {"total_players": 1}
         for clause_id in real_clause_ids:
-            if clause_id not in stats["clause_stats"]:
-                stats["clause_stats"][clause_id] = {
-                    "found_count": 0,
-                    "total_players": 0,
-                    "percentage": 0.0
-                }
-            
-            stats["clause_stats"][clause_id]["total_players"] = stats["total_players"]
-            
-            if clause_id in selected_clauses:
-                stats["clause_stats"][clause_id]["found_count"] += 1
-            
-            # Calculate percentage
-            found_count = stats["clause_stats"][clause_id]["found_count"]
-            total_players = stats["total_players"]
-            stats["clause_stats"][clause_id]["percentage"] = (found_count / total_players) * 100 if total_players > 0 else 0
+            # An increment of 0 still creates the counter for unfound clauses
+            increments[f"clause_stats.{clause_id}.found_count"] = 1 if clause_id in selected else 0
         
-        # Update or insert stats
-        await stats_collection.replace_one(
+        previous = await stats_collection.find_one_and_update(
             {"date": game_date},
-            stats,
-            upsert=True
+            {
+                "$inc": increments,
+                "$set": {"last_updated": datetime.utcnow()},
+                "$setOnInsert": {"average_score": 0.0}
+            },
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
         )
         
+        return with_percentages(previous) if previous else empty_stats(game_date)
+        
     except Exception as e:
         logger.error(f"Error updating game stats: {e}")
-        raise
\ No newline at end of file
+        raise
@@ -0,0 +1,62 @@
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from motor.motor_asyncio import AsyncIOMotorCollection
+from ..live_stats import live_stats_hub, SubscriberLimitReached
+from ..serialization import render
+from .game import get_stats_collection
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Comment line sent when nothing changed for a while, so proxies keep the stream open
+KEEPALIVE_SECONDS = 15
+
+@router.get("/stats/{game_date}/live")
+async def stream_game_stats(
+    game_date: str,
+    stats_collection: AsyncIOMotorCollection = Depends(get_stats_collection)
+):
+    """Stream total_players and clause_stats changes for a date as Server-Sent Events"""
+    try:
+        datetime.strptime(game_date, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    
+    if live_stats_hub.full:
+        raise HTTPException(status_code=503, detail="Too many live stats subscribers, poll /stats instead")
+    
+    # The generator subscribes itself, so a response that never starts never leaks a subscriber
+    return StreamingResponse(
+        stats_events(game_date, stats_collection),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/live-stats/subscribers")
+async def get_live_stats_subscribers():
+    """Get live stats channel and subscriber counts for this process"""
+    return live_stats_hub.stats()
+
+async def stats_events(game_date: str, stats_collection: AsyncIOMotorCollection):
+    """Subscribe to a date and format its stats updates as SSE messages until the subscription ends"""
+    try:
+        subscription = live_stats_hub.subscribe(game_date, stats_collection)
+    except SubscriberLimitReached:
+        # The limit was reached after the pre-check; the client reconnects later
+        return
+    try:
+        while True:
+            try:
+                update = await asyncio.wait_for(subscription.queue.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if update is None:
+                return
+            yield b"event: stats\ndata: " + render(update) + b"\n\n"
+    finally:
+        live_stats_hub.unsubscribe(subscription)
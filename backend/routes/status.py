@@ -0,0 +1,103 @@
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from typing import List, Optional
+from motor.motor_asyncio import AsyncIOMotorCollection
+from ..models import StatusCheck, StatusCheckCreate, StatusRollup
+from ..database import get_database
+from ..serialization import render
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Rows fetched from Mongo per cursor batch when streaming
+STATUS_STREAM_BATCH_SIZE = int(os.environ.get("STATUS_STREAM_BATCH_SIZE", "500"))
+STATUS_PAGE_LIMIT = 1000
+
+async def get_status_collection() -> AsyncIOMotorCollection:
+    db = await get_database()
+    return db.status_checks
+
+def encode_cursor(status_check: dict) -> str:
+    """Opaque keyset cursor pointing just past a row"""
+    return f"{status_check['timestamp'].isoformat()}|{status_check['id']}"
+
+def cursor_filter(after: Optional[str]) -> dict:
+    """Filter for rows ordered after the (timestamp, id) encoded in a cursor"""
+    if not after:
+        return {}
+    timestamp, _, status_id = after.partition("|")
+    try:
+        after_timestamp = datetime.fromisoformat(timestamp)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"$or": [
+        {"timestamp": {"$gt": after_timestamp}},
+        {"timestamp": after_timestamp, "id": {"$gt": status_id}}
+    ]}
+
+@router.post("/status", response_model=StatusCheck)
+async def create_status_check(
+    input: StatusCheckCreate,
+    status_collection: AsyncIOMotorCollection = Depends(get_status_collection)
+):
+    status_dict = input.dict()
+    status_obj = StatusCheck(**status_dict)
+    _ = await status_collection.insert_one(status_obj.dict())
+    return status_obj
+
+@router.get("/status", response_model=List[StatusCheck])
+async def get_status_checks(
+    response: Response,
+    after: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor header"),
+    limit: Optional[int] = Query(None, ge=1, description=f"Page size, at most {STATUS_PAGE_LIMIT}; unlimited when streaming"),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    status_collection: AsyncIOMotorCollection = Depends(get_status_collection)
+):
+    """Page through status checks in (timestamp, id) order, or stream them as NDJSON"""
+    cursor = status_collection.find(cursor_filter(after), {"_id": 0}).sort([("timestamp", 1), ("id", 1)])
+
+    if format == "ndjson":
+        cursor = cursor.batch_size(STATUS_STREAM_BATCH_SIZE)
+        if limit is not None:
+            cursor = cursor.limit(limit)
+        return StreamingResponse(stream_status_checks(cursor), media_type="application/x-ndjson")
+
+    limit = min(limit or STATUS_PAGE_LIMIT, STATUS_PAGE_LIMIT)
+    status_checks = await cursor.limit(limit).to_list(limit)
+    if len(status_checks) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(status_checks[-1])
+    return [StatusCheck(**status_check) for status_check in status_checks]
+
+@router.get("/status/rollups", response_model=List[StatusRollup])
+async def get_status_rollups(
+    client_name: Optional[str] = None,
+    since: Optional[datetime] = Query(None, description="First hour to include (UTC)"),
+    until: Optional[datetime] = Query(None, description="Hour to stop before (UTC)"),
+    limit: int = Query(STATUS_PAGE_LIMIT, ge=1, le=STATUS_PAGE_LIMIT)
+):
+    """Get hourly per-client status check rollups, oldest first"""
+    query = {}
+    if client_name is not None:
+        query["client_name"] = client_name
+    if since is not None or until is not None:
+        query["hour"] = {}
+        if since is not None:
+            query["hour"]["$gte"] = since
+        if until is not None:
+            query["hour"]["$lt"] = until
+    
+    db = await get_database()
+    rollups = await db.status_rollups.find(query, {"_id": 0}).sort([("hour", 1), ("client_name", 1)]).limit(limit).to_list(limit)
+    return [StatusRollup(**rollup) for rollup in rollups]
+
+async def stream_status_checks(cursor):
+    """Yield one JSON line per row as the cursor's batches arrive"""
+    try:
+        async for status_check in cursor:
+            yield render(status_check) + b"\n"
+    finally:
+        await cursor.close()
@@ -0,0 +1,115 @@
+"""Pre-aggregated score histograms per game date
+
+Bonus scores move in steps of 0.1, so each histogram bucket is one tenth of
+a point and a date never has more than a few dozen buckets. Percentiles
+are read from the histogram instead of scanning game_results.
+
+Rebuild from game_results offline with:
+
+    python -m backend.score_histogram [--date YYYY-MM-DD]
+"""
+import argparse
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import ReplaceOne, ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+# Buckets per score point; matches the 0.1 bonus granularity
+BUCKETS_PER_POINT = 10
+
+
+def bucket_for(total_score: float) -> str:
+    """Histogram bucket key (score in tenths) for a total score"""
+    return str(round(total_score * BUCKETS_PER_POINT))
+
+
+def percentile_of(histogram: Optional[dict], total_score: float) -> Optional[float]:
+    """Share of players in histogram who scored strictly below total_score, in percent
+
+    None when nobody played before, since there is nobody to compare with.
+    """
+    if not histogram or not histogram.get("total_players"):
+        return None
+    bucket = int(bucket_for(total_score))
+    below = sum(count for key, count in histogram.get("buckets", {}).items() if int(key) < bucket)
+    return below / histogram["total_players"] * 100
+
+
+async def record_score(game_date: str, total_score: float, histograms_collection: AsyncIOMotorCollection) -> Optional[float]:
+    """Count a score and return the percentile it reaches among earlier players"""
+    previous = await histograms_collection.find_one_and_update(
+        {"date": game_date},
+        {"$inc": {f"buckets.{bucket_for(total_score)}": 1, "total_players": 1}},
+        upsert=True,
+        return_document=ReturnDocument.BEFORE
+    )
+    return percentile_of(previous, total_score)
+
+
+def distribution(game_date: str, histogram: Optional[dict]) -> Dict[str, Any]:
+    """Buckets in score order with counts and the cumulative share at or below each"""
+    histogram = histogram or {}
+    total_players = histogram.get("total_players", 0)
+    buckets = []
+    cumulative = 0
+    for key in sorted(histogram.get("buckets", {}), key=int):
+        count = histogram["buckets"][key]
+        cumulative += count
+        buckets.append({
+            "score": int(key) / BUCKETS_PER_POINT,
+            "count": count,
+            "cumulative_percentage": cumulative / total_players * 100 if total_players else 0.0
+        })
+    return {"date": game_date, "total_players": total_players, "buckets": buckets}
+
+
+async def rebuild_histograms(db: AsyncIOMotorDatabase, game_date: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Recompute histograms from game_results, for one date or for all of them"""
+    pipeline = []
+    if game_date is not None:
+        pipeline.append({"$match": {"game_date": game_date}})
+    pipeline.append({"$group": {
+        "_id": {
+            "date": "$game_date",
+            "bucket": {"$round": [{"$multiply": ["$score.total", BUCKETS_PER_POINT]}, 0]}
+        },
+        "count": {"$sum": 1}
+    }})
+
+    histograms: Dict[str, dict] = defaultdict(lambda: {"buckets": {}, "total_players": 0})
+    async for group in db.game_results.aggregate(pipeline):
+        histogram = histograms[group["_id"]["date"]]
+        histogram["buckets"][str(int(group["_id"]["bucket"]))] = group["count"]
+        histogram["total_players"] += group["count"]
+
+    operations = [
+        ReplaceOne({"date": date}, dict(histogram, date=date), upsert=True)
+        for date, histogram in histograms.items()
+    ]
+    if operations:
+        await db.score_histograms.bulk_write(operations, ordered=False)
+    logger.info(f"Rebuilt score histograms for {len(operations)} dates")
+    return [{"date": date, "total_players": histogram["total_players"]} for date, histogram in sorted(histograms.items())]
+
+
+async def main(args: argparse.Namespace) -> None:
+    from .database import connect_database, close_database
+
+    db = await connect_database()
+    try:
+        print(json.dumps(await rebuild_histograms(db, args.date), indent=2))
+    finally:
+        await close_database()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild score histograms from game_results")
+    parser.add_argument("--date", help="only rebuild this date (YYYY-MM-DD)")
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(main(parser.parse_args()))
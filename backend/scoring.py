@@ -0,0 +1,55 @@
+from typing import Dict, Iterable, List
+
+
+class CompiledGame:
+    """Scoring index for one game, built once from its stored document
+
+    Every clause in the quiz order gets one bit, so a player's selection,
+    the real clauses and the correct answers are all plain integer masks.
+    """
+
+    __slots__ = ("date", "real_clause_ids", "real_ids", "clauses", "quiz_order", "bits", "real_mask", "full_mask")
+
+    def __init__(self, game_data: dict):
+        self.date = game_data["date"]
+        self.real_clause_ids = tuple(clause["id"] for clause in game_data["real_absurd_clauses"])
+        self.real_ids = frozenset(self.real_clause_ids)
+        self.clauses = {
+            clause["id"]: clause
+            for clause in game_data["real_absurd_clauses"] + game_data["fake_absurd_clauses"]
+        }
+        # Quiz entries without a matching clause are not scored
+        self.quiz_order = tuple(clause_id for clause_id in game_data["quiz_order"] if clause_id in self.clauses)
+        # One bit per distinct clause; a clause repeated in the quiz order shares its bit
+        self.bits = {clause_id: 1 << position for position, clause_id in enumerate(dict.fromkeys(self.quiz_order))}
+        self.full_mask = (1 << len(self.bits)) - 1
+        self.real_mask = self.mask_of(self.real_ids)
+
+    def mask_of(self, clause_ids: Iterable[str]) -> int:
+        """Bitmask of the given clause ids that appear in the quiz"""
+        mask = 0
+        bits = self.bits
+        for clause_id in clause_ids:
+            mask |= bits.get(clause_id, 0)
+        return mask
+
+    def correct_answers(self, selected_clauses: List[str]) -> List[str]:
+        """Selected clause ids that are real, in selection order"""
+        real_ids = self.real_ids
+        return [clause_id for clause_id in selected_clauses if clause_id in real_ids]
+
+    def user_answers(self, selected_clauses: List[str]) -> List[Dict[str, object]]:
+        """Per-clause answer records in quiz order"""
+        selected_mask = self.mask_of(selected_clauses)
+        correct_mask = ~(selected_mask ^ self.real_mask) & self.full_mask
+        real_mask = self.real_mask
+        bits = self.bits
+        return [
+            {
+                "clause_id": clause_id,
+                "was_selected": bool(selected_mask & bits[clause_id]),
+                "is_real": bool(real_mask & bits[clause_id]),
+                "correct": bool(correct_mask & bits[clause_id]),
+            }
+            for clause_id in self.quiz_order
+        ]
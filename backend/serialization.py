@@ -0,0 +1,48 @@
+import json
+import os
+from functools import lru_cache
+from typing import Any
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; without it responses use the standard json module
+    orjson = None
+
+# Opt-in fast path: orjson for plain data, pydantic-core serializers for models
+FAST_JSON = orjson is not None and os.environ.get("FAST_JSON", "false").lower() in ("1", "true", "yes")
+
+
+@lru_cache(maxsize=None)
+def serializer_for(tp: Any) -> TypeAdapter:
+    """Cached TypeAdapter whose compiled serializer is reused for every response of this type"""
+    return TypeAdapter(tp)
+
+
+def _orjson_default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def render(content: Any) -> bytes:
+    """Serialize content to JSON bytes, matching what JSONResponse would send"""
+    if FAST_JSON:
+        if isinstance(content, BaseModel):
+            return serializer_for(type(content)).dump_json(content)
+        return orjson.dumps(content, default=_orjson_default)
+    return json.dumps(
+        jsonable_encoder(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def json_response(content: Any, status_code: int = 200) -> Response:
+    """Response for data we built ourselves, bypassing response_model validation"""
+    return Response(content=render(content), status_code=status_code, media_type="application/json")
@@ -1,79 +1,111 @@
 from fastapi import FastAPI, APIRouter
-from dotenv import load_dotenv
+from fastapi.responses import PlainTextResponse
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
+from contextlib import asynccontextmanager
+import importlib
 import logging
-from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List
-import uuid
-from datetime import datetime
 
-# Import the game routes
+# Import the game and status routes
 from .routes.game import router as game_router
+from .routes.status import router as status_router
+from .routes.live import router as live_router
+from .routes.admin import router as admin_router
+from .stats_aggregator import stats_aggregator
+from .result_ingest import result_ingestor
+from .indexes import ensure_indexes, find_collection_scans
+from .prerender import prerender_scheduler
+from .status_retention import status_rollup_task
+from .live_stats import live_stats_hub
+from .database import connect_database, close_database, pool_monitor
+from .metrics import METRICS_ENABLED, MetricsMiddleware, render_metrics
+from .profiling import PROFILING_ENABLED, ProfilingMiddleware
 
-ROOT_DIR = Path(__file__).parent
-load_dotenv(ROOT_DIR / '.env')
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Own the shared Mongo client and the background tasks that use it"""
+    db = await connect_database()
+    app.state.index_report = await ensure_indexes(db)
+    await find_collection_scans(db)
+    result_ingestor.start(db.game_results)
+    stats_aggregator.start(db.game_stats)
+    prerender_scheduler.start(db)
+    await status_rollup_task.start(db)
+    try:
+        yield
+    finally:
+        await live_stats_hub.stop()
+        await status_rollup_task.stop()
+        await prerender_scheduler.stop()
+        await result_ingestor.stop()
+        await stats_aggregator.stop()
+        await close_database()
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+class LazyApp:
+    """ASGI app that imports "module:factory" and builds the real app on its first request"""
+
+    def __init__(self, target: str):
+        self.target = target
+        self._app = None
+
+    async def __call__(self, scope, receive, send):
+        if self._app is None:
+            module_name, _, factory = self.target.partition(":")
+            self._app = getattr(importlib.import_module(module_name), factory)()
+        await self._app(scope, receive, send)
 
 # Create the main app without a prefix
-app = FastAPI(title="T&C Auditor API", version="1.0.0")
+app = FastAPI(title="T&C Auditor API", version="1.0.0", lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
-# Define Models for existing endpoints
-class StatusCheck(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    client_name: str
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
-
-class StatusCheckCreate(BaseModel):
-    client_name: str
-
 # Add existing routes to the router
 @api_router.get("/")
 async def root():
     return {"message": "T&C Auditor API is running"}
 
-@api_router.post("/status", response_model=StatusCheck)
-async def create_status_check(input: StatusCheckCreate):
-    status_dict = input.dict()
-    status_obj = StatusCheck(**status_dict)
-    _ = await db.status_checks.insert_one(status_obj.dict())
-    return status_obj
-
-@api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
-    return [StatusCheck(**status_check) for status_check in status_checks]
+@api_router.get("/db/pool")
+async def get_pool_stats():
+    """Get connection pool checkout counts and wait times"""
+    return pool_monitor.stats()
 
-# Include the game router
+# Include the status, game, live stats and admin routers
+api_router.include_router(status_router, tags=["status"])
 api_router.include_router(game_router, tags=["game"])
+api_router.include_router(live_router, tags=["live"])
+api_router.include_router(admin_router, tags=["admin"])
 
 # Include the router in the main app
 app.include_router(api_router)
 
+# Rarely used admin tooling, imported on its first request instead of in every worker
+app.mount("/api/admin/migration", LazyApp("backend.routes.data_migration:create_app"))
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Request and Mongo command metrics for Prometheus to scrape"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    # Browsers on other origins can only read response headers listed here
+    expose_headers=["X-Next-Cursor"],
 )
 
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+if METRICS_ENABLED:
+    # Added last so it wraps CORS and times the whole request
+    app.add_middleware(MetricsMiddleware)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
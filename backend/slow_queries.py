@@ -0,0 +1,213 @@
+"""Slow Mongo operation log with redacted query shapes and sampled explain plans
+
+Commands slower than SLOW_QUERY_MS are kept in a ring buffer and
+aggregated by shape: the collection, the command and the filter with every
+value replaced by "?". The first slow occurrence of a shape, and at most
+one per SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS after that, is explained on
+the event loop so its winning plan (COLLSCAN, IXSCAN on which index) shows
+up next to the timings.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# Commands whose filter is worth recording and that the explain command accepts
+EXPLAINABLE = {"find", "aggregate", "count", "distinct", "findAndModify", "update", "delete"}
+
+# Driver-added fields the explain command rejects inside the explained command
+SESSION_FIELDS = {"lsid", "txnNumber", "$db", "$clusterTime", "$readPreference", "readConcern"}
+
+
+def redact(value: Any) -> Any:
+    """Keep keys and operators, replace every value with "?" """
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        # Pipelines and $and/$or keep their structure; value lists collapse to one marker
+        if value and all(isinstance(item, dict) for item in value):
+            return [redact(item) for item in value]
+        return "?"
+    return "?"
+
+
+def query_shape(command_name: str, command: dict) -> Dict[str, Any]:
+    """The redacted parts of a command that decide its plan"""
+    if command_name == "find":
+        shape = {"filter": command.get("filter", {}), "sort": command.get("sort"), "projection": command.get("projection")}
+    elif command_name == "aggregate":
+        shape = {"pipeline": command.get("pipeline", [])}
+    elif command_name == "findAndModify":
+        shape = {"filter": command.get("query", {}), "sort": command.get("sort")}
+    elif command_name == "update":
+        shape = {"filter": command["updates"][0].get("q", {})} if command.get("updates") else {}
+    elif command_name == "delete":
+        shape = {"filter": command["deletes"][0].get("q", {})} if command.get("deletes") else {}
+    else:
+        shape = {"filter": command.get("query", {})}
+    return {key: redact(value) for key, value in shape.items() if value is not None}
+
+
+def plan_summary(explanation: dict) -> str:
+    """Winning plan stages from the root down, e.g. "FETCH > IXSCAN(date_unique)" """
+    stages = []
+    plan = explanation.get("queryPlanner", {}).get("winningPlan", {})
+    while plan:
+        stage = plan.get("stage", "?")
+        stages.append(f"{stage}({plan['indexName']})" if "indexName" in plan else stage)
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return " > ".join(stages)
+
+
+class SlowQueryLog(monitoring.CommandListener):
+    """CommandListener keeping slow commands in a ring buffer and per-shape totals"""
+
+    def __init__(self, threshold_ms: float = 100, buffer_size: int = 200, max_shapes: int = 200, explain_interval: float = 60):
+        self.threshold_ms = threshold_ms
+        self.max_shapes = max_shapes
+        self.explain_interval = explain_interval
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=buffer_size)
+        self.shapes: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self._pending: Dict[Tuple[object, int], dict] = {}
+        self._lock = threading.Lock()
+        self._db: Optional[AsyncIOMotorDatabase] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._explaining = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms > 0
+
+    def attach(self, db: AsyncIOMotorDatabase) -> None:
+        """Explain slow commands against db on the running event loop"""
+        self._db = db
+        self._loop = asyncio.get_running_loop()
+
+    def detach(self) -> None:
+        self._db = None
+        self._loop = None
+
+    def started(self, event):
+        if event.command_name in EXPLAINABLE:
+            with self._lock:
+                self._pending[(event.connection_id, event.request_id)] = event.command
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+    def _finish(self, event, failed: bool) -> None:
+        if event.command_name not in EXPLAINABLE:
+            return
+        with self._lock:
+            command = self._pending.pop((event.connection_id, event.request_id), None)
+        duration_ms = event.duration_micros / 1000
+        if command is None or duration_ms < self.threshold_ms:
+            return
+        self.record(event.command_name, command, duration_ms, failed)
+
+    def record(self, command_name: str, command: dict, duration_ms: float, failed: bool = False) -> None:
+        """Add one slow command to the buffer and its shape's totals"""
+        collection = command.get(command_name)
+        shape = query_shape(command_name, command)
+        shape_key = (str(collection), command_name, json.dumps(shape, sort_keys=True, default=str))
+        entry = {
+            "at": datetime.utcnow().isoformat(),
+            "collection": collection,
+            "command": command_name,
+            "shape": shape,
+            "duration_ms": round(duration_ms, 2),
+            "failed": failed,
+        }
+        logger.warning(f"Slow Mongo operation: {json.dumps(entry, default=str)}")
+
+        now = time.monotonic()
+        with self._lock:
+            self.recent.append(entry)
+            totals = self.shapes.get(shape_key)
+            if totals is None:
+                if len(self.shapes) >= self.max_shapes:
+                    # Forget the shape that has cost the least so far
+                    del self.shapes[min(self.shapes, key=lambda key: self.shapes[key]["total_ms"])]
+                totals = self.shapes[shape_key] = {
+                    "collection": collection,
+                    "command": command_name,
+                    "shape": shape,
+                    "count": 0,
+                    "failures": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "plan": None,
+                    "explained_at": None,
+                    "_next_explain": 0.0,
+                }
+            totals["count"] += 1
+            totals["failures"] += int(failed)
+            totals["total_ms"] += duration_ms
+            totals["max_ms"] = max(totals["max_ms"], duration_ms)
+            totals["last_seen"] = entry["at"]
+
+            explain = self._loop is not None and not self._explaining and now >= totals["_next_explain"]
+            if explain:
+                self._explaining = True
+                totals["_next_explain"] = now + self.explain_interval
+
+        if explain:
+            explained = {key: value for key, value in command.items() if key not in SESSION_FIELDS}
+            try:
+                asyncio.run_coroutine_threadsafe(self._explain(shape_key, explained), self._loop)
+            except RuntimeError:
+                self._explaining = False
+
+    async def _explain(self, shape_key: Tuple[str, str, str], command: dict) -> None:
+        # One explain at a time; shapes that turn slow meanwhile wait for their next occurrence
+        try:
+            explanation = await self._db.command({"explain": command, "verbosity": "queryPlanner"})
+            summary = plan_summary(explanation)
+            with self._lock:
+                if shape_key in self.shapes:
+                    self.shapes[shape_key]["plan"] = summary
+                    self.shapes[shape_key]["explained_at"] = datetime.utcnow().isoformat()
+            logger.warning(f"Slow {shape_key[1]} on {shape_key[0]} uses plan {summary}")
+        except Exception as e:
+            logger.error(f"Error explaining slow {shape_key[1]} on {shape_key[0]}: {e}")
+        finally:
+            self._explaining = False
+
+    def top(self, limit: int = 10, by: str = "max_ms") -> List[Dict[str, Any]]:
+        """The limit slowest shapes, ordered by max_ms, total_ms or count"""
+        with self._lock:
+            shapes = [
+                {key: value for key, value in totals.items() if not key.startswith("_")}
+                for totals in self.shapes.values()
+            ]
+        for shape in shapes:
+            shape["mean_ms"] = round(shape["total_ms"] / shape["count"], 2)
+            shape["total_ms"] = round(shape["total_ms"], 2)
+            shape["max_ms"] = round(shape["max_ms"], 2)
+        return sorted(shapes, key=lambda shape: shape[by], reverse=True)[:limit]
+
+    def recent_entries(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """The most recent slow commands, newest first"""
+        with self._lock:
+            return list(self.recent)[-limit:][::-1]
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=float(os.environ.get("SLOW_QUERY_MS", "100")),
+    buffer_size=int(os.environ.get("SLOW_QUERY_BUFFER_SIZE", "200")),
+    max_shapes=int(os.environ.get("SLOW_QUERY_MAX_SHAPES", "200")),
+    explain_interval=float(os.environ.get("SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS", "60")),
+)
@@ -0,0 +1,128 @@
+"""Import cost and resident memory per module for a fresh worker
+
+Imports the target module in clean subprocesses, once under
+``-X importtime`` for timings and once under tracemalloc for the memory
+each import keeps resident, then reports the heaviest modules:
+
+    python -m backend.startup_report [--module backend.server] [--top 20]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(args: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], cwd=ROOT_DIR, capture_output=True, text=True, check=True)
+
+
+def import_times(module: str) -> List[Dict[str, Any]]:
+    """Self and cumulative import time per module, in milliseconds"""
+    result = _run(["-X", "importtime", "-c", f"import {module}"])
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        times.append({"module": name.strip(), "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000})
+    return times
+
+
+def measure_imports(module: str) -> None:
+    """Child process side: import module and print the traced memory each import kept
+
+    builtins.__import__ is wrapped so every import is charged the growth in
+    traced memory it caused, minus what its own nested imports account for.
+    That covers the module's bytecode, constants and module-level data.
+    """
+    import builtins
+    import importlib.util
+    import resource
+    import tracemalloc
+
+    original_import = builtins.__import__
+    kept: Dict[str, int] = {}
+    nested_totals = [0]
+
+    def label_for(name, globals, fromlist, level) -> str:
+        if not level:
+            return name
+        package = (globals or {}).get("__package__") or ""
+        try:
+            base = importlib.util.resolve_name("." * level + name, package)
+        except (ImportError, ValueError):
+            return name
+        if fromlist and not name:
+            return ",".join(f"{base}.{item}" for item in fromlist)
+        return base
+
+    def measured_import(name, globals=None, locals=None, fromlist=(), level=0):
+        label = label_for(name, globals, fromlist, level)
+        if all(part in sys.modules for part in label.split(",")):
+            return original_import(name, globals, locals, fromlist, level)
+        before = tracemalloc.get_traced_memory()[0]
+        nested_totals.append(0)
+        try:
+            return original_import(name, globals, locals, fromlist, level)
+        finally:
+            nested = nested_totals.pop()
+            total = tracemalloc.get_traced_memory()[0] - before
+            kept[label] = kept.get(label, 0) + total - nested
+            nested_totals[-1] += total
+
+    tracemalloc.start()
+    builtins.__import__ = measured_import
+    try:
+        measured_import(module)
+    finally:
+        builtins.__import__ = original_import
+    print(json.dumps({
+        "by_module": {name: size for name, size in kept.items() if size > 0},
+        "traced_kb": tracemalloc.get_traced_memory()[0] / 1024,
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "modules_loaded": len(sys.modules),
+    }))
+
+
+def memory_by_module(module: str) -> Dict[str, Any]:
+    """Memory each module kept after importing module in a fresh interpreter"""
+    result = _run(["-c", f"from backend.startup_report import measure_imports; measure_imports({module!r})"])
+    measured = json.loads(result.stdout.strip().splitlines()[-1])
+    return {
+        "max_rss_mb": round(measured["max_rss_kb"] / 1024, 1),
+        "traced_mb": round(measured["traced_kb"] / 1024, 1),
+        "modules_loaded": measured["modules_loaded"],
+        "by_module": measured["by_module"],
+    }
+
+
+def startup_report(module: str = "backend.server", top: int = 20) -> Dict[str, Any]:
+    times = import_times(module)
+    memory = memory_by_module(module)
+    total_ms = next((entry["cumulative_ms"] for entry in times if entry["module"] == module), 0.0)
+    own = [entry for entry in times if entry["module"].startswith("backend")]
+    return {
+        "module": module,
+        "import_ms": total_ms,
+        "max_rss_mb": memory["max_rss_mb"],
+        "traced_mb": memory["traced_mb"],
+        "modules_loaded": memory["modules_loaded"],
+        "slowest_imports": sorted(times, key=lambda entry: entry["self_ms"], reverse=True)[:top],
+        "backend_imports": sorted(own, key=lambda entry: entry["cumulative_ms"], reverse=True),
+        "memory_kb_by_module": [
+            {"module": name, "kb": round(size / 1024, 1)}
+            for name, size in sorted(memory["by_module"].items(), key=lambda item: item[1], reverse=True)[:top]
+        ],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="backend.server", help="module a worker imports at startup")
+    parser.add_argument("--top", type=int, default=20, help="modules listed per ranking")
+    args = parser.parse_args()
+    print(json.dumps(startup_report(args.module, args.top), indent=2))
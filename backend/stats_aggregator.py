@@ -0,0 +1,153 @@
+import asyncio
+import copy
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+
+class StatsAggregator:
+    """Write-behind counters for game_stats, flushed with one bulk_write
+
+    Submissions increment in-memory per-date deltas instead of writing the
+    date's stats document. A background task flushes the deltas as $inc
+    operations every flush_interval_ms, or sooner once flush_max_submissions
+    submissions are pending, and once more on shutdown.
+    """
+
+    def __init__(self, enabled: bool = False, flush_interval_ms: int = 500, flush_max_submissions: int = 1000):
+        self.enabled = enabled
+        self.flush_interval_ms = flush_interval_ms
+        self.flush_max_submissions = flush_max_submissions
+        self.flush_count = 0
+        self._stats_collection: Optional[AsyncIOMotorCollection] = None
+        self._snapshots: Dict[str, dict] = {}
+        self._pending: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._in_flight: Dict[str, Dict[str, int]] = {}
+        self._pending_submissions = 0
+        self._wakeup = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, stats_collection: AsyncIOMotorCollection) -> None:
+        """Start the background flush task"""
+        self._stats_collection = stats_collection
+        if self.enabled and self._task is None:
+            self._wakeup = asyncio.Event()
+            self._stopping = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background flush task and flush what is left
+
+        The task is asked to finish rather than cancelled, so a bulk_write in
+        flight completes (or puts its deltas back) before the client closes.
+        """
+        if self._task is not None:
+            self._stopping.set()
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    async def record(self, game_date: str, selected_clauses: List[str], real_clause_ids: Iterable[str], stats_collection: AsyncIOMotorCollection) -> dict:
+        """Count a submission and return the stats view as it was before it"""
+        if game_date not in self._snapshots:
+            snapshot = await stats_collection.find_one({"date": game_date}, {"_id": 0})
+            self._snapshots.setdefault(game_date, snapshot or {"date": game_date, "total_players": 0, "clause_stats": {}, "average_score": 0.0})
+
+        previous = self.view(game_date)
+
+        selected = set(selected_clauses)
+        deltas = self._pending[game_date]
+        deltas["total_players"] += 1
+        for clause_id in real_clause_ids:
+            deltas[f"clause_stats.{clause_id}.found_count"] += 1 if clause_id in selected else 0
+
+        self._pending_submissions += 1
+        if self._pending_submissions >= self.flush_max_submissions:
+            self._wakeup.set()
+
+        return previous
+
+    def view(self, game_date: str) -> dict:
+        """Last persisted snapshot merged with unflushed deltas"""
+        stats = copy.deepcopy(self._snapshots[game_date])
+        for deltas in (self._in_flight.get(game_date), self._pending.get(game_date)):
+            if not deltas:
+                continue
+            for path, amount in deltas.items():
+                if path == "total_players":
+                    stats["total_players"] = stats.get("total_players", 0) + amount
+                else:
+                    clause_id = path[len("clause_stats."):-len(".found_count")]
+                    clause_stat = stats.setdefault("clause_stats", {}).setdefault(clause_id, {"found_count": 0})
+                    clause_stat["found_count"] = clause_stat.get("found_count", 0) + amount
+        return stats
+
+    async def flush(self) -> None:
+        """Write all pending deltas with one bulk_write"""
+        if not self._pending or self._stats_collection is None:
+            return
+
+        self._in_flight = self._pending
+        self._pending = defaultdict(lambda: defaultdict(int))
+        self._pending_submissions = 0
+
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {"date": game_date},
+                {"$inc": dict(deltas), "$set": {"last_updated": now}, "$setOnInsert": {"average_score": 0.0}},
+                upsert=True
+            )
+            for game_date, deltas in self._in_flight.items()
+        ]
+
+        try:
+            await self._stats_collection.bulk_write(operations, ordered=False)
+            self.flush_count += 1
+        except Exception as e:
+            logger.error(f"Error flushing game stats: {e}")
+            # Put the deltas back so the next flush retries them
+            for game_date, deltas in self._in_flight.items():
+                for path, amount in deltas.items():
+                    self._pending[game_date][path] += amount
+            self._in_flight = {}
+            return
+
+        try:
+            # Refresh snapshots so they include other processes' increments too
+            dates = list(self._in_flight)
+            refreshed = await self._stats_collection.find({"date": {"$in": dates}}, {"_id": 0}).to_list(len(dates))
+            for stats in refreshed:
+                self._snapshots[stats["date"]] = stats
+        except Exception as e:
+            logger.error(f"Error refreshing game stats snapshots: {e}")
+            # Fall back to re-reading on the next submission for these dates
+            for game_date in self._in_flight:
+                self._snapshots.pop(game_date, None)
+        finally:
+            self._in_flight = {}
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval_ms / 1000)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+
+stats_aggregator = StatsAggregator(
+    enabled=os.environ.get("STATS_WRITE_BEHIND", "false").lower() in ("1", "true", "yes"),
+    flush_interval_ms=int(os.environ.get("STATS_FLUSH_INTERVAL_MS", "500")),
+    flush_max_submissions=int(os.environ.get("STATS_FLUSH_MAX_SUBMISSIONS", "1000")),
+)
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, IndexModel, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+logger = logging.getLogger(__name__)
+
+TTL_INDEX_NAME = "timestamp_ttl"
+ROLLUP_STATE_ID = "status_rollup_watermark"
+
+# Mongo error codes for an index that exists with different options
+INDEX_OPTIONS_CONFLICT = (85, 86)
+
+
+def _hour_start(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+async def ensure_status_ttl(db: AsyncIOMotorDatabase, retention_hours: int) -> None:
+    """Expire status checks retention_hours after their timestamp; 0 keeps them forever"""
+    collection = db.status_checks
+    if retention_hours <= 0:
+        try:
+            await collection.drop_index(TTL_INDEX_NAME)
+        except OperationFailure:
+            pass
+        return
+
+    expire_after = retention_hours * 3600
+    try:
+        await collection.create_indexes([
+            IndexModel([("timestamp", ASCENDING)], name=TTL_INDEX_NAME, expireAfterSeconds=expire_after)
+        ])
+    except OperationFailure as e:
+        if e.code not in INDEX_OPTIONS_CONFLICT:
+            raise
+        # The retention changed since the index was built; update it in place
+        await db.command("collMod", "status_checks", index={"name": TTL_INDEX_NAME, "expireAfterSeconds": expire_after})
+    logger.info(f"Status checks expire after {retention_hours} hours")
+
+
+async def rollup_status_checks(db: AsyncIOMotorDatabase, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Fold every completed hour not yet rolled up into per-client hourly rollups
+
+    Rollups are written with $set of each (client, hour) total, so running a
+    window twice writes the same documents. The watermark only moves, by
+    compare-and-set, once they are written; a failed or interrupted run
+    leaves it in place and the next run redoes the same hours.
+    """
+    state = db.status_rollup_state
+    current_hour = _hour_start(now or datetime.utcnow())
+
+    watermark = await state.find_one({"_id": ROLLUP_STATE_ID})
+    if watermark is None:
+        oldest = await db.status_checks.find_one({}, {"timestamp": 1}, sort=[("timestamp", ASCENDING)])
+        start = _hour_start(oldest["timestamp"]) if oldest else current_hour
+        try:
+            await state.insert_one({"_id": ROLLUP_STATE_ID, "rolled_up_to": start})
+        except DuplicateKeyError:
+            pass
+        watermark = await state.find_one({"_id": ROLLUP_STATE_ID})
+
+    start = watermark["rolled_up_to"]
+    if start >= current_hour:
+        return {"from": start, "to": start, "rollups": 0}
+
+    pipeline = [
+        {"$match": {"timestamp": {"$gte": start, "$lt": current_hour}}},
+        {"$group": {
+            "_id": {
+                "client_name": "$client_name",
+                "hour": {"$dateFromParts": {
+                    "year": {"$year": "$timestamp"},
+                    "month": {"$month": "$timestamp"},
+                    "day": {"$dayOfMonth": "$timestamp"},
+                    "hour": {"$hour": "$timestamp"}
+                }}
+            },
+            "count": {"$sum": 1},
+            "first_seen": {"$min": "$timestamp"},
+            "last_seen": {"$max": "$timestamp"}
+        }}
+    ]
+    groups = await db.status_checks.aggregate(pipeline).to_list(None)
+
+    operations = [
+        UpdateOne(
+            {"client_name": group["_id"]["client_name"], "hour": group["_id"]["hour"]},
+            {"$set": {
+                "count": group["count"],
+                "first_seen": group["first_seen"],
+                "last_seen": group["last_seen"]
+            }},
+            upsert=True
+        )
+        for group in groups
+    ]
+    if operations:
+        await db.status_rollups.bulk_write(operations, ordered=False)
+
+    advanced = await state.find_one_and_update(
+        {"_id": ROLLUP_STATE_ID, "rolled_up_to": start},
+        {"$set": {"rolled_up_to": current_hour}},
+        return_document=ReturnDocument.AFTER
+    )
+    if advanced is None:
+        # Another process rolled up the same window concurrently and wrote the same totals
+        return {"from": start, "to": start, "rollups": 0}
+
+    logger.info(f"Rolled up status checks from {start} to {current_hour} into {len(operations)} hourly rollups")
+    return {"from": start, "to": current_hour, "rollups": len(operations)}
+
+
+class StatusRollupTask:
+    """Applies the retention TTL at startup, then rolls up status checks every interval"""
+
+    def __init__(self, retention_hours: int = 168, interval_minutes: int = 15):
+        self.retention_hours = retention_hours
+        self.interval_minutes = interval_minutes
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, db: AsyncIOMotorDatabase) -> None:
+        """Apply the TTL index and start the rollup schedule"""
+        if 0 < self.retention_hours * 60 <= self.interval_minutes + 60:
+            logger.warning("Status check retention is shorter than the rollup interval; some checks will expire before they are rolled up")
+        try:
+            await ensure_status_ttl(db, self.retention_hours)
+        except Exception as e:
+            logger.error(f"Error applying status check retention: {e}")
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self) -> None:
+        """Cancel the rollup schedule"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, db: AsyncIOMotorDatabase) -> None:
+        while True:
+            try:
+                await rollup_status_checks(db)
+            except Exception as e:
+                logger.error(f"Error rolling up status checks: {e}")
+            await asyncio.sleep(self.interval_minutes * 60)
+
+
+status_rollup_task = StatusRollupTask(
+    retention_hours=int(os.environ.get("STATUS_RETENTION_HOURS", "168")),
+    interval_minutes=int(os.environ.get("STATUS_ROLLUP_INTERVAL_MINUTES", "15")),
+)
@@ -4,16 +4,15 @@ Complete T&C Data Migration Script - All 27 Days
 Migrates from mock data to real business T&C content
 """
 
+import argparse
 import asyncio
 import json
 import uuid
 from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv('backend/.env')
+# Importing backend loads backend/.env (backend/config.py) before any backend setting is read
+from backend.content_migration import RESETTABLE, migrate_games, swap_games
 
 # Complete dataset for all 27 days (structured from the user's data)
 COMPLETE_TC_DATA = [
@@ -171,7 +170,7 @@ def generate_game_data(day_data):
         "created_at": datetime.utcnow()
     }
 
-async def migrate_complete_data():
+async def migrate_complete_data(args):
     """Complete migration with all 27 days"""
     print("🚀 Starting Complete T&C Data Migration (All 27 Days)...")
     
@@ -181,20 +180,8 @@ async def migrate_complete_data():
     
     # Get collections
     games_collection = db.games
-    results_collection = db.game_results
-    stats_collection = db.game_stats
-    
-    # Step 1: Clear existing data
-    print("\n🗑️  Clearing existing data...")
-    deleted_games = await games_collection.delete_many({})
-    deleted_results = await results_collection.delete_many({})
-    deleted_stats = await stats_collection.delete_many({})
-    
-    print(f"   ✅ Deleted {deleted_games.deleted_count} games")
-    print(f"   ✅ Deleted {deleted_results.deleted_count} results")
-    print(f"   ✅ Deleted {deleted_stats.deleted_count} stats")
     
-    # Step 2: Prepare all 27 days of data
+    # Step 1: Prepare all 27 days of data
     print("\n📄 Preparing all 27 days of real business T&C data...")
     
     # Combine initial 3 days with remaining 24 days
@@ -208,13 +195,26 @@ async def migrate_complete_data():
     
     print(f"   ✅ Prepared {len(games_to_insert)} days of content")
     
-    # Step 3: Insert all data
-    print(f"\n💾 Inserting all {len(games_to_insert)} days...")
+    # Step 2: Write only the days that are new, changed or no longer in the dataset
+    print(f"\n💾 Diffing {len(games_to_insert)} days against the stored games...")
     
-    result = await games_collection.insert_many(games_to_insert)
-    print(f"   ✅ Successfully inserted {len(result.inserted_ids)} games")
+    if args.swap:
+        report = await swap_games(db, games_to_insert, dry_run=args.dry_run)
+        verb = "Would swap in" if args.dry_run else "Swapped in"
+        print(f"   ✅ {verb} {report['games']} days through a staging collection; {len(report['added'])} added, {len(report['dropped'])} dropped")
+    else:
+        report = await migrate_games(db, games_to_insert, prune=not args.keep_missing, dry_run=args.dry_run, reset=args.reset)
+        verb = "Would write" if args.dry_run else "Wrote"
+        print(f"   ✅ {verb} {len(report['inserted'])} new, {len(report['updated'])} changed, {len(report['deleted'])} removed days; {report['unchanged']} unchanged")
+        for name, dates in report["reset"].items():
+            print(f"   ✅ {'Would reset' if args.dry_run else 'Reset'} {name} for {len(dates)} days")
     
-    # Step 4: Verify migration
+    if args.dry_run:
+        print(json.dumps(report, indent=2))
+        client.close()
+        return
+    
+    # Step 3: Verify migration
     print("\n🔍 Verifying complete migration...")
     total_games = await games_collection.count_documents({})
     print(f"   ✅ Total games in database: {total_games}")
@@ -251,5 +251,15 @@ async def migrate_complete_data():
     
     client.close()
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load the T&C content, writing only the days that differ from the database")
+    parser.add_argument("--dry-run", action="store_true", help="report the changes without writing them")
+    parser.add_argument("--keep-missing", action="store_true", help="keep stored days that are not in this dataset")
+    parser.add_argument("--reset", action="append", default=[], choices=sorted(RESETTABLE),
+                        help="also clear this collection for changed or removed days (repeatable)")
+    parser.add_argument("--swap", action="store_true",
+                        help="load a staging collection and rename it over games instead of diffing")
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    asyncio.run(migrate_complete_data())
\ No newline at end of file
+    asyncio.run(migrate_complete_data(parse_args()))
\ No newline at end of file
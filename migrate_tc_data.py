@@ -4,16 +4,15 @@ T&C Data Migration Script
 Migrates from mock data to real business T&C content for 27 days
 """
 
+import argparse
 import asyncio
 import json
 import uuid
 from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv('backend/.env')
+# Importing backend loads backend/.env (backend/config.py) before any backend setting is read
+from backend.content_migration import RESETTABLE, migrate_games, swap_games
 
 # Real business T&C data for all 27 days
 REAL_TC_DATA = {
@@ -71,7 +70,7 @@ def generate_game_data(day, reading_doc, puzzle_data):
         "created_at": datetime.utcnow()
     }
 
-async def migrate_data():
+async def migrate_data(args):
     """Main migration function"""
     print("🚀 Starting T&C Data Migration...")
     
@@ -81,20 +80,8 @@ async def migrate_data():
     
     # Get collections
     games_collection = db.games
-    results_collection = db.game_results
-    stats_collection = db.game_stats
-    
-    # Step 1: Clear existing data
-    print("\n🗑️  Clearing existing mock data...")
-    deleted_games = await games_collection.delete_many({})
-    deleted_results = await results_collection.delete_many({})
-    deleted_stats = await stats_collection.delete_many({})
-    
-    print(f"   ✅ Deleted {deleted_games.deleted_count} games")
-    print(f"   ✅ Deleted {deleted_results.deleted_count} results")
-    print(f"   ✅ Deleted {deleted_stats.deleted_count} stats")
     
-    # Step 2: Load and validate real T&C data
+    # Step 1: Load and validate real T&C data
     print("\n📄 Loading real business T&C data...")
     
     # For this implementation, I'll create a sample with Day 1 (Meta)
@@ -155,13 +142,26 @@ async def migrate_data():
         }
         sample_data.append(sample_game)
     
-    # Step 3: Insert new data
-    print(f"\n💾 Inserting {len(sample_data)} days of real business T&C data...")
-    
-    result = await games_collection.insert_many(sample_data)
-    print(f"   ✅ Successfully inserted {len(result.inserted_ids)} games")
-    
-    # Step 4: Verify data
+    # Step 2: Write only the days that are new, changed or no longer in the dataset
+    print(f"\n💾 Diffing {len(sample_data)} days against the stored games...")
+    
+    if args.swap:
+        report = await swap_games(db, sample_data, dry_run=args.dry_run)
+        verb = "Would swap in" if args.dry_run else "Swapped in"
+        print(f"   ✅ {verb} {report['games']} days through a staging collection; {len(report['added'])} added, {len(report['dropped'])} dropped")
+    else:
+        report = await migrate_games(db, sample_data, prune=not args.keep_missing, dry_run=args.dry_run, reset=args.reset)
+        verb = "Would write" if args.dry_run else "Wrote"
+        print(f"   ✅ {verb} {len(report['inserted'])} new, {len(report['updated'])} changed, {len(report['deleted'])} removed days; {report['unchanged']} unchanged")
+        for name, dates in report["reset"].items():
+            print(f"   ✅ {'Would reset' if args.dry_run else 'Reset'} {name} for {len(dates)} days")
+    
+    if args.dry_run:
+        print(json.dumps(report, indent=2))
+        client.close()
+        return
+    
+    # Step 3: Verify data
     print("\n🔍 Verifying migration...")
     total_games = await games_collection.count_documents({})
     print(f"   ✅ Total games in database: {total_games}")
@@ -174,13 +174,23 @@ async def migrate_data():
         print(f"   ✅ Fake clauses: {len(sample_game['fake_absurd_clauses'])}")
     
     print(f"\n🎉 Migration completed successfully!")
-    print(f"📊 Summary:")
-    print(f"   • Cleared all mock data")
-    print(f"   • Imported {len(sample_data)} days of real business T&C content")
+    print("📊 Summary:")
+    print("   • Left results and stats untouched unless --reset was given")
+    print(f"   • Synced {len(sample_data)} days of real business T&C content")
     print(f"   • Companies: Meta, TikTok, Google/YouTube, Apple, Netflix, Amazon")
     print(f"   • Date range: 2025-07-07 to 2025-07-12")
     
     client.close()
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load the T&C content, writing only the days that differ from the database")
+    parser.add_argument("--dry-run", action="store_true", help="report the changes without writing them")
+    parser.add_argument("--keep-missing", action="store_true", help="keep stored days that are not in this dataset")
+    parser.add_argument("--reset", action="append", default=[], choices=sorted(RESETTABLE),
+                        help="also clear this collection for changed or removed days (repeatable)")
+    parser.add_argument("--swap", action="store_true",
+                        help="load a staging collection and rename it over games instead of diffing")
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    asyncio.run(migrate_data())
\ No newline at end of file
+    asyncio.run(migrate_data(parse_args()))
\ No newline at end of file
@@ -0,0 +1,90 @@
+import codecs
+import json
+import unittest
+from unittest import mock
+
+from backend.content_import import RecordDecoder
+
+
+def decode(chunks):
+    """Records from byte chunks, decoded the way import_stream does"""
+    decoder = RecordDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    records = []
+    for chunk in chunks:
+        records.extend(decoder.feed(text_decoder.decode(chunk)))
+    records.extend(decoder.feed(text_decoder.decode(b"", final=True)))
+    records.extend(decoder.close())
+    return records
+
+
+def split_every(data: bytes, size: int):
+    return [data[start:start + size] for start in range(0, len(data), size)]
+
+
+RECORDS = [
+    {"date": "2025-01-01", "title": "Première partie — naïve façade"},
+    {"date": "2025-01-02", "title": "日本語のタイトル", "tc_text": "x" * 50},
+    {"date": "2025-01-03", "title": "emoji 🎉", "nested": {"list": [1, 2, 3]}},
+]
+
+
+class TestRecordDecoder(unittest.TestCase):
+
+    def test_ndjson_split_across_every_chunk_boundary(self):
+        data = "\n".join(json.dumps(record, ensure_ascii=False) for record in RECORDS).encode("utf-8")
+        for size in (1, 2, 3, 7, 64, len(data)):
+            with self.subTest(chunk_size=size):
+                self.assertEqual(decode(split_every(data, size)), RECORDS)
+
+    def test_json_array_split_across_every_chunk_boundary(self):
+        data = json.dumps(RECORDS, ensure_ascii=False, indent=2).encode("utf-8")
+        for size in (1, 2, 3, 7, 64, len(data)):
+            with self.subTest(chunk_size=size):
+                self.assertEqual(decode(split_every(data, size)), RECORDS)
+
+    def test_multibyte_character_split_between_chunks(self):
+        line = json.dumps({"title": "🎉"}, ensure_ascii=False).encode("utf-8")
+        emoji_start = line.index("🎉".encode("utf-8"))
+        chunks = [line[:emoji_start + 1], line[emoji_start + 1:emoji_start + 3], line[emoji_start + 3:] + b"\n"]
+        self.assertEqual(decode(chunks), [{"title": "🎉"}])
+
+    def test_blank_lines_and_missing_final_newline(self):
+        self.assertEqual(decode([b'\n{"a": 1}\n\n', b'  \n{"a": 2}']), [{"a": 1}, {"a": 2}])
+
+    def test_malformed_line_is_reported_and_decoding_continues(self):
+        records = decode([b'{"a": 1}\n{"a": \n{"a": 3}\n'])
+        self.assertEqual(records[0], {"a": 1})
+        self.assertIsInstance(records[1], ValueError)
+        self.assertIn("line 2", str(records[1]))
+        self.assertEqual(records[2], {"a": 3})
+
+    def test_truncated_json_array(self):
+        with self.assertRaises(ValueError):
+            decode([b'[{"a": 1}, {"a": '])
+        with self.assertRaises(ValueError):
+            decode([b'[{"a": 1}'])
+
+    def test_empty_array_and_empty_input(self):
+        self.assertEqual(decode([b" [ ] "]), [])
+        self.assertEqual(decode([b"", b"  \n"]), [])
+
+    def test_ndjson_line_longer_than_limit(self):
+        with mock.patch("backend.content_import.MAX_RECORD_CHARS", 100):
+            decoder = RecordDecoder()
+            decoder.feed('{"a": 1}\n')
+            with self.assertRaises(ValueError):
+                for _ in range(20):
+                    decoder.feed('{"padding": "' + "x" * 10)
+
+    def test_array_record_longer_than_limit(self):
+        with mock.patch("backend.content_import.MAX_RECORD_CHARS", 100):
+            decoder = RecordDecoder()
+            decoder.feed("[")
+            with self.assertRaises(ValueError):
+                for _ in range(20):
+                    decoder.feed('{"padding": "' + "x" * 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
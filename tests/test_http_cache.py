@@ -0,0 +1,96 @@
+import unittest
+from datetime import datetime, timezone
+
+from starlette.requests import Request
+
+from backend.http_cache import (
+    PAST_GAME_CACHE_CONTROL, build_cached_response, choose_encoding, game_cache_control, is_not_modified
+)
+
+
+def make_request(**headers) -> Request:
+    raw = [(name.replace("_", "-").lower().encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "query_string": b"", "headers": raw})
+
+
+class TestIsNotModified(unittest.TestCase):
+
+    ETAG = '"abc123"'
+    VARIANTS = [ETAG, '"abc123-gzip"', '"abc123-br"']
+    LAST_MODIFIED = datetime(2025, 1, 1, 12, 30, 15, tzinfo=timezone.utc)
+
+    def test_matching_etag(self):
+        self.assertTrue(is_not_modified(make_request(if_none_match=self.ETAG), self.VARIANTS, None))
+
+    def test_variant_etag(self):
+        self.assertTrue(is_not_modified(make_request(if_none_match='"abc123-br"'), self.VARIANTS, None))
+
+    def test_weak_etag_matches_by_weak_comparison(self):
+        self.assertTrue(is_not_modified(make_request(if_none_match='W/"abc123-gzip"'), self.VARIANTS, None))
+
+    def test_etag_list_and_wildcard(self):
+        self.assertTrue(is_not_modified(make_request(if_none_match='"other", "abc123"'), self.VARIANTS, None))
+        self.assertTrue(is_not_modified(make_request(if_none_match="*"), self.VARIANTS, None))
+
+    def test_stale_etag(self):
+        self.assertFalse(is_not_modified(make_request(if_none_match='"old"'), self.VARIANTS, self.LAST_MODIFIED))
+
+    def test_if_none_match_takes_precedence_over_if_modified_since(self):
+        request = make_request(if_none_match='"old"', if_modified_since="Wed, 01 Jan 2025 12:30:15 GMT")
+        self.assertFalse(is_not_modified(request, self.VARIANTS, self.LAST_MODIFIED))
+
+    def test_if_modified_since_at_second_precision(self):
+        self.assertTrue(is_not_modified(make_request(if_modified_since="Wed, 01 Jan 2025 12:30:15 GMT"), self.VARIANTS, self.LAST_MODIFIED))
+        self.assertTrue(is_not_modified(make_request(if_modified_since="Wed, 01 Jan 2025 12:30:16 GMT"), self.VARIANTS, self.LAST_MODIFIED))
+        self.assertFalse(is_not_modified(make_request(if_modified_since="Wed, 01 Jan 2025 12:30:14 GMT"), self.VARIANTS, self.LAST_MODIFIED))
+
+    def test_build_cached_response_truncates_last_modified(self):
+        cached = build_cached_response({"a": 1}, datetime(2025, 1, 1, 12, 30, 15, 999999))
+        self.assertEqual(cached.last_modified, self.LAST_MODIFIED)
+        request = make_request(if_modified_since="Wed, 01 Jan 2025 12:30:15 GMT")
+        self.assertTrue(is_not_modified(request, [cached.etag], cached.last_modified))
+
+    def test_malformed_if_modified_since(self):
+        self.assertFalse(is_not_modified(make_request(if_modified_since="yesterday"), self.VARIANTS, self.LAST_MODIFIED))
+
+
+class TestChooseEncoding(unittest.TestCase):
+
+    SIZES = {"gzip": 120, "br": 100}
+
+    def test_smallest_accepted_variant(self):
+        self.assertEqual(choose_encoding("gzip, deflate, br", self.SIZES), "br")
+        self.assertEqual(choose_encoding("gzip", self.SIZES), "gzip")
+
+    def test_q_zero_refuses_an_encoding(self):
+        self.assertEqual(choose_encoding("gzip, br;q=0", self.SIZES), "gzip")
+        self.assertEqual(choose_encoding("br;q=0.0, gzip;q=0", self.SIZES), None)
+
+    def test_wildcard_and_identity(self):
+        self.assertEqual(choose_encoding("*", self.SIZES), "br")
+        self.assertIsNone(choose_encoding("", self.SIZES))
+        self.assertIsNone(choose_encoding("identity", self.SIZES))
+        self.assertIsNone(choose_encoding("gzip", {}))
+
+
+class TestGameCacheControl(unittest.TestCase):
+
+    NOW = datetime(2025, 1, 2, 23, 0, 0, tzinfo=timezone.utc)
+
+    def test_today_is_cached_until_rollover(self):
+        self.assertEqual(game_cache_control("2025-01-02", self.NOW), "public, max-age=3600")
+        just_before = datetime(2025, 1, 2, 23, 59, 59, 500000, tzinfo=timezone.utc)
+        self.assertEqual(game_cache_control("2025-01-02", just_before), "public, max-age=0")
+
+    def test_past_and_future_dates(self):
+        self.assertEqual(game_cache_control("2025-01-01", self.NOW), PAST_GAME_CACHE_CONTROL)
+        self.assertNotIn("immutable", PAST_GAME_CACHE_CONTROL)
+        self.assertEqual(game_cache_control("2025-01-03", self.NOW), "no-cache")
+
+    def test_fallback_game_always_revalidates(self):
+        for game_date in ("2025-01-01", "2025-01-02", "2025-01-03"):
+            self.assertEqual(game_cache_control(game_date, self.NOW, fallback=True), "no-cache")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import asyncio
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from starlette.requests import Request
+
+try:
+    from mongomock_motor import AsyncMongoMockClient
+except ImportError:  # mongomock-motor is only needed for these tests
+    AsyncMongoMockClient = None
+
+from backend.cache import clear_game_caches
+from backend.content_migration import migrate_games
+from backend.routes.game import FALLBACK_GAME_TEMPLATE, get_daily_game
+
+GAME_DATE = "2025-01-01"
+
+REAL_GAME = {
+    "date": GAME_DATE,
+    "title": "Real terms",
+    "tc_text": "Real terms of service",
+    "real_absurd_clauses": [{"id": "r1", "text": "real"}],
+    "fake_absurd_clauses": [{"id": "f1", "text": "fake"}],
+    "quiz_order": ["r1", "f1"],
+}
+
+
+def make_request(**headers) -> Request:
+    raw = [(name.replace("_", "-").lower().encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "query_string": b"", "headers": raw})
+
+
+@unittest.skipIf(AsyncMongoMockClient is None, "mongomock-motor is not installed")
+class TestLastModifiedAfterMigration(unittest.TestCase):
+
+    def setUp(self):
+        clear_game_caches()
+        # Serve from the database path only, whatever sits in PRERENDER_DIR
+        patcher = mock.patch("backend.routes.game.load_prerendered", return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(clear_game_caches)
+
+    def test_migrated_day_is_not_reported_unmodified(self):
+        asyncio.run(self.migrate_over_fallback())
+
+    async def migrate_over_fallback(self):
+        games = AsyncMongoMockClient()["test"].games
+
+        response = await get_daily_game(GAME_DATE, make_request(), games)
+        self.assertIn(FALLBACK_GAME_TEMPLATE["title"].encode(), response.body)
+        # The placeholder was created well before the migration runs
+        await games.update_one({"date": GAME_DATE}, {"$set": {"created_at": datetime(2024, 12, 31, 8, 0, 0)}})
+        clear_game_caches()
+        last_modified = (await get_daily_game(GAME_DATE, make_request(), games)).headers["last-modified"]
+
+        await migrate_games(games.database, [REAL_GAME])
+        clear_game_caches()
+
+        response = await get_daily_game(GAME_DATE, make_request(if_modified_since=last_modified), games)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"Real terms", response.body)
+        self.assertNotEqual(response.headers["last-modified"], last_modified)
+
+
+if __name__ == "__main__":
+    unittest.main()
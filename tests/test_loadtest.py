@@ -0,0 +1,33 @@
+import unittest
+
+from backend.loadtest import percentile
+
+
+class TestPercentile(unittest.TestCase):
+
+    def test_nearest_rank_on_100_values(self):
+        values = [float(n) for n in range(1, 101)]
+        self.assertEqual(percentile(values, 0.50), 50.0)
+        self.assertEqual(percentile(values, 0.95), 95.0)
+        self.assertEqual(percentile(values, 0.99), 99.0)
+        self.assertEqual(percentile(values, 1.0), 100.0)
+
+    def test_nearest_rank_on_10_values(self):
+        values = [float(n) for n in range(1, 11)]
+        self.assertEqual(percentile(values, 0.50), 5.0)
+        self.assertEqual(percentile(values, 0.95), 10.0)
+        self.assertEqual(percentile(values, 0.07), 1.0)
+
+    def test_fractions_that_are_inexact_in_floating_point(self):
+        values = [float(n) for n in range(1, 101)]
+        self.assertEqual(percentile(values, 0.07), 7.0)
+        self.assertEqual(percentile(values, 0.29), 29.0)
+
+    def test_edges(self):
+        self.assertEqual(percentile([], 0.95), 0.0)
+        self.assertEqual(percentile([4.2], 0.5), 4.2)
+        self.assertEqual(percentile([1.0, 2.0], 0.0), 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
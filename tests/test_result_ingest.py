@@ -0,0 +1,148 @@
+import asyncio
+import unittest
+
+from pymongo.errors import BulkWriteError
+
+from backend.result_ingest import ResultIngestor
+
+
+class FakeResults:
+    """Records insert_many batches; fail_indexes fail per document like an unordered bulk write"""
+
+    def __init__(self, delay: float = 0.0, fail_indexes=(), error: Exception = None):
+        self.delay = delay
+        self.fail_indexes = set(fail_indexes)
+        self.error = error
+        self.batches = []
+        self.inserted = []
+
+    async def insert_many(self, documents, ordered=True):
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        self.batches.append(len(documents))
+        failed = [index for index in range(len(documents)) if index in self.fail_indexes]
+        self.inserted.extend(document for index, document in enumerate(documents) if index not in failed)
+        if failed:
+            raise BulkWriteError({"writeErrors": [{"index": index, "code": 11000, "errmsg": "duplicate"} for index in failed]})
+
+    async def insert_one(self, document):
+        self.inserted.append(document)
+
+
+class TestResultIngestor(unittest.TestCase):
+
+    def run_async(self, coroutine):
+        return asyncio.run(asyncio.wait_for(coroutine, 5))
+
+    def test_batches_by_size(self):
+        async def scenario():
+            results = FakeResults()
+            ingestor = ResultIngestor(max_batch_size=4, max_delay_ms=50)
+            ingestor.start(results)
+            await asyncio.gather(*[ingestor.submit({"n": n}, results) for n in range(10)])
+            await ingestor.stop()
+            return results, ingestor
+
+        results, ingestor = self.run_async(scenario())
+        self.assertEqual(results.batches, [4, 4, 2])
+        self.assertEqual(sorted(document["n"] for document in results.inserted), list(range(10)))
+        self.assertEqual(ingestor.documents_written, 10)
+
+    def test_per_index_failures_reach_only_their_submitters(self):
+        async def scenario():
+            results = FakeResults(fail_indexes={1})
+            ingestor = ResultIngestor(max_batch_size=3, max_delay_ms=50)
+            ingestor.start(results)
+            outcomes = await asyncio.gather(*[ingestor.submit({"n": n}, results) for n in range(3)], return_exceptions=True)
+            await ingestor.stop()
+            return outcomes, ingestor
+
+        outcomes, ingestor = self.run_async(scenario())
+        self.assertIsNone(outcomes[0])
+        self.assertIsInstance(outcomes[1], BulkWriteError)
+        self.assertIsNone(outcomes[2])
+        self.assertEqual(ingestor.documents_written, 2)
+
+    def test_whole_batch_failure_reaches_every_submitter(self):
+        async def scenario():
+            results = FakeResults(error=RuntimeError("connection lost"))
+            ingestor = ResultIngestor(max_batch_size=2, max_delay_ms=50)
+            ingestor.start(results)
+            outcomes = await asyncio.gather(*[ingestor.submit({"n": n}, results) for n in range(2)], return_exceptions=True)
+            await ingestor.stop()
+            return outcomes
+
+        for outcome in self.run_async(scenario()):
+            self.assertIsInstance(outcome, RuntimeError)
+
+    def test_full_queue_blocks_submitters(self):
+        async def scenario():
+            results = FakeResults(delay=0.01)
+            ingestor = ResultIngestor(max_batch_size=2, max_delay_ms=1, max_queue_size=2)
+            ingestor.start(results)
+            submissions = [asyncio.create_task(ingestor.submit({"n": n}, results)) for n in range(20)]
+            peak = 0
+            while not all(task.done() for task in submissions):
+                peak = max(peak, ingestor._queue.qsize())
+                await asyncio.sleep(0.001)
+            await ingestor.stop()
+            return results, peak
+
+        results, peak = self.run_async(scenario())
+        self.assertLessEqual(peak, 2)
+        self.assertEqual(len(results.inserted), 20)
+
+    def test_stop_drains_submitters_blocked_on_a_full_queue(self):
+        async def scenario():
+            results = FakeResults(delay=0.01)
+            ingestor = ResultIngestor(max_batch_size=2, max_delay_ms=1, max_queue_size=2)
+            ingestor.start(results)
+            submissions = [asyncio.create_task(ingestor.submit({"n": n}, results)) for n in range(12)]
+            await asyncio.sleep(0)
+            await ingestor.stop()
+            await asyncio.gather(*submissions)
+            return results, ingestor
+
+        results, ingestor = self.run_async(scenario())
+        self.assertEqual(sorted(document["n"] for document in results.inserted), list(range(12)))
+        self.assertTrue(ingestor._queue.empty())
+
+    def test_drain_picks_up_submitter_woken_during_last_write(self):
+        async def scenario():
+            results = FakeResults(delay=0.01)
+            ingestor = ResultIngestor(max_batch_size=10, max_delay_ms=1, max_queue_size=1)
+            ingestor._results_collection = results
+            ingestor._queue = asyncio.Queue(maxsize=1)
+            loop = asyncio.get_running_loop()
+            first = loop.create_future()
+            ingestor._queue.put_nowait(({"n": 0}, first))
+            # Blocked on the full queue until the drain takes the first document
+            second = loop.create_future()
+            blocked = asyncio.create_task(ingestor._queue.put(({"n": 1}, second)))
+            await asyncio.sleep(0)
+            self.assertFalse(blocked.done())
+
+            await ingestor._drain()
+            await asyncio.wait_for(asyncio.gather(first, second), 1)
+            return results, ingestor
+
+        results, ingestor = self.run_async(scenario())
+        self.assertEqual([document["n"] for document in results.inserted], [0, 1])
+        self.assertTrue(ingestor._queue.empty())
+
+    def test_submit_writes_directly_when_not_running(self):
+        async def scenario():
+            results = FakeResults()
+            ingestor = ResultIngestor(enabled=False)
+            ingestor.start(results)
+            await ingestor.submit({"n": 1}, results)
+            return results
+
+        results = self.run_async(scenario())
+        self.assertEqual(results.inserted, [{"n": 1}])
+        self.assertEqual(results.batches, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+
+from backend.scoring import CompiledGame
+
+
+GAME = {
+    "date": "2025-01-01",
+    "real_absurd_clauses": [{"id": f"rac{n}", "text": f"real {n}"} for n in range(1, 6)],
+    "fake_absurd_clauses": [{"id": f"fac{n}", "text": f"fake {n}"} for n in range(1, 6)],
+    "quiz_order": ["rac1", "fac2", "rac3", "fac1", "rac2", "fac4", "rac4", "rac5", "fac5", "fac3"],
+}
+
+
+def baseline_correct_answers(game_data, selected_clauses):
+    """The list-based scoring the submit route used before CompiledGame"""
+    real_clause_ids = [clause["id"] for clause in game_data["real_absurd_clauses"]]
+    return [clause_id for clause_id in selected_clauses if clause_id in real_clause_ids]
+
+
+def baseline_user_answers(game_data, selected_clauses):
+    real_clause_ids = [clause["id"] for clause in game_data["real_absurd_clauses"]]
+    all_clauses = game_data["real_absurd_clauses"] + game_data["fake_absurd_clauses"]
+    user_answers = []
+    for clause_id in game_data["quiz_order"]:
+        clause = next((c for c in all_clauses if c["id"] == clause_id), None)
+        if clause:
+            is_real = clause_id in real_clause_ids
+            was_selected = clause_id in selected_clauses
+            user_answers.append({
+                "clause_id": clause_id,
+                "was_selected": was_selected,
+                "is_real": is_real,
+                "correct": (is_real and was_selected) or (not is_real and not was_selected),
+            })
+    return user_answers
+
+
+class TestCompiledGame(unittest.TestCase):
+
+    SELECTIONS = [
+        [],
+        ["rac1"],
+        ["rac1", "rac2", "rac3", "rac4", "rac5"],
+        ["fac1", "fac2"],
+        ["rac3", "fac4", "rac1"],
+        ["unknown", "rac2", "also-unknown"],
+        ["rac1", "rac1", "fac2", "fac2"],
+        [clause_id for clause_id in GAME["quiz_order"]],
+    ]
+
+    def assert_matches_baseline(self, game_data, selected_clauses):
+        game = CompiledGame(game_data)
+        self.assertEqual(game.correct_answers(selected_clauses), baseline_correct_answers(game_data, selected_clauses))
+        self.assertEqual(game.user_answers(selected_clauses), baseline_user_answers(game_data, selected_clauses))
+
+    def test_matches_baseline(self):
+        for selected_clauses in self.SELECTIONS:
+            with self.subTest(selected_clauses=selected_clauses):
+                self.assert_matches_baseline(GAME, selected_clauses)
+
+    def test_duplicate_selections_count_each_time(self):
+        game = CompiledGame(GAME)
+        self.assertEqual(game.correct_answers(["rac1", "rac1"]), ["rac1", "rac1"])
+
+    def test_quiz_order_with_unknown_and_repeated_ids(self):
+        game_data = dict(GAME, quiz_order=["rac1", "missing", "fac1", "rac1", "fac2"])
+        for selected_clauses in self.SELECTIONS:
+            with self.subTest(selected_clauses=selected_clauses):
+                self.assert_matches_baseline(game_data, selected_clauses)
+
+    def test_real_clauses_missing_from_quiz_order(self):
+        game_data = dict(GAME, quiz_order=["fac1", "rac2"])
+        for selected_clauses in self.SELECTIONS:
+            with self.subTest(selected_clauses=selected_clauses):
+                self.assert_matches_baseline(game_data, selected_clauses)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import asyncio
+import unittest
+
+from backend.stats_aggregator import StatsAggregator
+
+GAME_DATE = "2025-01-01"
+REAL_CLAUSE_IDS = ["r1", "r2"]
+
+
+class FakeCursor:
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    async def to_list(self, length):
+        return self.documents[:length]
+
+
+class FakeStats:
+    """Applies $inc upserts to in-memory documents; bulk_write can be held open or made to fail"""
+
+    def __init__(self, documents=()):
+        self.documents = {document["date"]: dict(document, clause_stats=dict(document.get("clause_stats", {}))) for document in documents}
+        self.release = asyncio.Event()
+        self.release.set()
+        self.writing = asyncio.Event()
+        self.fail = False
+        self.writes = 0
+        self.concurrent = 0
+        self.max_concurrent = 0
+
+    async def find_one(self, query, projection=None):
+        document = self.documents.get(query["date"])
+        return dict(document) if document else None
+
+    def find(self, query, projection=None):
+        return FakeCursor([dict(self.documents[date]) for date in query["date"]["$in"] if date in self.documents])
+
+    async def bulk_write(self, operations, ordered=True):
+        self.concurrent += 1
+        self.max_concurrent = max(self.max_concurrent, self.concurrent)
+        self.writing.set()
+        try:
+            await self.release.wait()
+            if self.fail:
+                raise RuntimeError("connection lost")
+            for operation in operations:
+                game_date = operation._filter["date"]
+                document = self.documents.setdefault(game_date, {"date": game_date, "total_players": 0, "clause_stats": {}})
+                for path, amount in operation._doc["$inc"].items():
+                    if path == "total_players":
+                        document["total_players"] += amount
+                    else:
+                        clause_id = path.split(".")[1]
+                        clause_stat = document["clause_stats"].setdefault(clause_id, {"found_count": 0})
+                        clause_stat["found_count"] += amount
+            self.writes += 1
+        finally:
+            self.concurrent -= 1
+            self.writing.clear()
+
+
+class TestStatsAggregator(unittest.TestCase):
+
+    def run_async(self, coroutine):
+        return asyncio.run(asyncio.wait_for(coroutine, 5))
+
+    def test_view_merges_snapshot_in_flight_and_pending(self):
+        async def scenario():
+            stats = FakeStats([{"date": GAME_DATE, "total_players": 5, "clause_stats": {"r1": {"found_count": 3}}}])
+            aggregator = StatsAggregator()
+            aggregator.start(stats)
+            previous = await aggregator.record(GAME_DATE, ["r1"], REAL_CLAUSE_IDS, stats)
+            self.assertEqual(previous["total_players"], 5)
+
+            stats.release.clear()
+            flush = asyncio.create_task(aggregator.flush())
+            await stats.writing.wait()
+            await aggregator.record(GAME_DATE, ["r1", "r2"], REAL_CLAUSE_IDS, stats)
+
+            view = aggregator.view(GAME_DATE)
+            self.assertEqual(view["total_players"], 7)
+            self.assertEqual(view["clause_stats"], {"r1": {"found_count": 5}, "r2": {"found_count": 1}})
+
+            stats.release.set()
+            await flush
+            self.assertEqual(aggregator.view(GAME_DATE), view)
+
+        self.run_async(scenario())
+
+    def test_failed_bulk_write_puts_deltas_back(self):
+        async def scenario():
+            stats = FakeStats()
+            aggregator = StatsAggregator()
+            aggregator.start(stats)
+            await aggregator.record(GAME_DATE, ["r1"], REAL_CLAUSE_IDS, stats)
+
+            stats.fail = True
+            await aggregator.flush()
+            self.assertEqual(aggregator.flush_count, 0)
+            self.assertEqual(aggregator._in_flight, {})
+            self.assertEqual(aggregator.view(GAME_DATE)["total_players"], 1)
+
+            stats.fail = False
+            await aggregator.record(GAME_DATE, ["r2"], REAL_CLAUSE_IDS, stats)
+            await aggregator.flush()
+            return stats, aggregator
+
+        stats, aggregator = self.run_async(scenario())
+        self.assertEqual(aggregator.flush_count, 1)
+        self.assertEqual(stats.documents[GAME_DATE]["total_players"], 2)
+        self.assertEqual(stats.documents[GAME_DATE]["clause_stats"], {"r1": {"found_count": 1}, "r2": {"found_count": 1}})
+
+    def test_stop_waits_for_in_flight_flush_then_flushes_the_rest(self):
+        async def scenario():
+            stats = FakeStats()
+            aggregator = StatsAggregator(enabled=True, flush_interval_ms=1)
+            aggregator.start(stats)
+            await aggregator.record(GAME_DATE, ["r1"], REAL_CLAUSE_IDS, stats)
+
+            stats.release.clear()
+            await stats.writing.wait()
+            # Recorded while the background flush is still writing
+            await aggregator.record(GAME_DATE, ["r2"], REAL_CLAUSE_IDS, stats)
+            stop = asyncio.create_task(aggregator.stop())
+            await asyncio.sleep(0.01)
+            self.assertFalse(stop.done())
+
+            stats.release.set()
+            await stop
+            return stats, aggregator
+
+        stats, aggregator = self.run_async(scenario())
+        self.assertEqual(stats.max_concurrent, 1)
+        self.assertEqual(stats.writes, 2)
+        self.assertEqual(stats.documents[GAME_DATE]["total_players"], 2)
+        self.assertIsNone(aggregator._task)
+        self.assertFalse(aggregator._pending)
+
+
+if __name__ == "__main__":
+    unittest.main()